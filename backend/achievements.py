@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Achievement Catalog for ThriveRemoteOS
+The fixed set of achievements every user starts with, the single idempotent
+statement that seeds them, and the rule engine that unlocks them from
+productivity events using per-user progress counters
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Achievement(NamedTuple):
+    id: str
+    achievement_type: str
+    title: str
+    description: str
+    icon: str
+
+
+ACHIEVEMENT_CATALOG: Tuple[Achievement, ...] = (
+    Achievement("first_job_apply", "job_application", "First Step", "Applied to your first job", "🎯"),
+    Achievement("savings_milestone_25", "savings", "Quarter Way There", "Reached 25% of savings goal", "💰"),
+    Achievement("savings_milestone_50", "savings", "Halfway Hero", "Reached 50% of savings goal", "💎"),
+    Achievement("task_master", "tasks", "Task Master", "Completed 10 tasks", "✅"),
+    Achievement("terminal_ninja", "terminal", "Terminal Ninja", "Executed 50 terminal commands", "⚡"),
+    Achievement("pong_champion", "gaming", "Pong Champion", "Score 200 points in Pong", "🏆"),
+    Achievement("easter_hunter", "easter_eggs", "Easter Egg Hunter", "Found 5 easter eggs", "🥚"),
+    Achievement("streak_week", "streak", "Weekly Warrior", "Maintained 7-day streak", "🔥"),
+    Achievement("relocation_explorer", "relocation", "Relocation Explorer",
+                "Explored relocation data and properties", "🏡"),
+)
+
+_COLUMNS = "(id, user_id, achievement_type, title, description, icon, unlocked)"
+_ROW_PLACEHOLDERS = "(%s, %s, %s, %s, %s, %s, FALSE)"
+
+
+def build_seed_query(user_ids: Sequence[str]) -> Tuple[str, Tuple]:
+    """One multi-row INSERT IGNORE giving each user every catalog achievement
+
+    Rows a user already has are skipped by the (id, user_id) primary key, so
+    the statement is safe to repeat and needs no existence check first.
+    """
+    rows: List[str] = []
+    params: List[str] = []
+    for user_id in user_ids:
+        for achievement in ACHIEVEMENT_CATALOG:
+            rows.append(_ROW_PLACEHOLDERS)
+            params.extend((
+                achievement.id, user_id, achievement.achievement_type,
+                achievement.title, achievement.description, achievement.icon,
+            ))
+    query = f"INSERT IGNORE INTO achievements {_COLUMNS} VALUES {', '.join(rows)}"
+    return query, tuple(params)
+
+
+class Rule(NamedTuple):
+    achievement_id: str
+    counter: str
+    threshold: float
+
+
+ACHIEVEMENT_RULES: Tuple[Rule, ...] = (
+    Rule("first_job_apply", "applications", 1),
+    Rule("savings_milestone_25", "savings_progress", 25),
+    Rule("savings_milestone_50", "savings_progress", 50),
+    Rule("task_master", "tasks_completed", 10),
+    Rule("terminal_ninja", "commands_executed", 50),
+    Rule("pong_champion", "pong_high_score", 200),
+    Rule("easter_hunter", "easter_eggs_found", 5),
+    Rule("streak_week", "daily_streak", 7),
+    Rule("relocation_explorer", "relocation_views", 1),
+)
+
+RULES_BY_COUNTER: Dict[str, Tuple[Rule, ...]] = {
+    counter: tuple(rule for rule in ACHIEVEMENT_RULES if rule.counter == counter)
+    for counter in {rule.counter for rule in ACHIEVEMENT_RULES}
+}
+
+# Event action -> (counter, metadata key carrying the new value). Events
+# without a key count one occurrence; the others report a level, of which
+# the highest seen is kept because every rule is "reached at least once".
+# Counts kept in user_counters are reported as levels read from that row,
+# so a replayed or repeated event cannot advance them.
+EVENT_COUNTERS: Dict[str, Tuple[str, Optional[str]]] = {
+    "job_application": ("applications", "applications"),
+    "task_completed": ("tasks_completed", "tasks_completed"),
+    "savings_update": ("savings_progress", "progress"),
+    "daily_streak": ("daily_streak", "streak"),
+    "pong_score": ("pong_high_score", "score"),
+    "terminal_command": ("commands_executed", None),
+    "easter_egg_found": ("easter_eggs_found", None),
+    "relocation_explored": ("relocation_views", None),
+}
+
+
+class UserProgress:
+    """Counter values and unlocked achievement ids for one user"""
+
+    __slots__ = ("counters", "unlocked", "expires_at")
+
+    def __init__(self, counters: Dict[str, float], unlocked: Set[str], expires_at: float):
+        self.counters = counters
+        self.unlocked = unlocked
+        self.expires_at = expires_at
+
+
+class AchievementEngine:
+    """Evaluates achievement rules per event against in-memory progress
+
+    A user's progress is loaded once (and again after ttl_seconds, to pick
+    up events handled by other workers); after that each event touches one
+    counter and only the rules watching it. Counter changes are applied when
+    the event's transaction commits, and unlocking relies on the conditional
+    UPDATE in unlock, so racing workers never unlock twice.
+
+    Progress is loaded on the event's own transaction, so it already holds
+    that transaction's writes and is only cached once they commit.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, Any], Awaitable[Tuple[Dict[str, float], Set[str]]]],
+        unlock: Callable[[str, str, Any], Awaitable[bool]],
+        ttl_seconds: float = 300.0,
+        max_users: int = 10000,
+    ):
+        self._loader = loader
+        self._unlock = unlock
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max(1, max_users)
+        self._progress: "OrderedDict[str, UserProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.events = 0
+        self.loads = 0
+        self.unlocks = 0
+
+    async def _get_progress(self, user_id: str, uow=None) -> UserProgress:
+        with self._lock:
+            progress = self._progress.get(user_id)
+            if progress is not None and progress.expires_at > time.monotonic():
+                self._progress.move_to_end(user_id)
+                return progress
+
+        counters, unlocked = await self._loader(user_id, uow)
+        self.loads += 1
+        progress = UserProgress(counters, unlocked, time.monotonic() + self.ttl_seconds)
+
+        def cache():
+            with self._lock:
+                self._progress[user_id] = progress
+                self._progress.move_to_end(user_id)
+                while len(self._progress) > self.max_users:
+                    self._progress.popitem(last=False)
+
+        if uow is None:
+            cache()
+        else:
+            uow.after_finish(lambda: cache() if uow.committed else None)
+        return progress
+
+    async def handle(self, user_id: str, action: str, metadata: Optional[Dict[str, Any]] = None,
+                     uow=None) -> Optional[float]:
+        """Apply one event and unlock whatever it completes; returns the counter's new value"""
+        mapping = EVENT_COUNTERS.get(action)
+        if mapping is None:
+            return None
+        counter, key = mapping
+        self.events += 1
+
+        progress = await self._get_progress(user_id, uow)
+        current = progress.counters.get(counter, 0)
+        value = current + 1 if key is None else max(current, float((metadata or {})[key]))
+
+        unlocked = []
+        for rule in RULES_BY_COUNTER.get(counter, ()):
+            if value >= rule.threshold and rule.achievement_id not in progress.unlocked:
+                if await self._unlock(user_id, rule.achievement_id, uow):
+                    self.unlocks += 1
+                unlocked.append(rule.achievement_id)
+
+        def apply():
+            with self._lock:
+                entry = self._progress.get(user_id)
+                if entry is None:
+                    return
+                if key is None:
+                    entry.counters[counter] = entry.counters.get(counter, 0) + 1
+                else:
+                    entry.counters[counter] = max(entry.counters.get(counter, 0), value)
+                entry.unlocked.update(unlocked)
+
+        if uow is None:
+            apply()
+        else:
+            uow.after_finish(lambda: apply() if uow.committed else None)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users_tracked": len(self._progress),
+            "events": self.events,
+            "progress_loads": self.loads,
+            "unlocks": self.unlocks,
+            "rules": len(ACHIEVEMENT_RULES),
+            "ttl_seconds": self.ttl_seconds,
+        }
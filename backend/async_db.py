@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Async Database Access for ThriveRemoteOS
+Runs blocking MySQL calls on a bounded thread pool so async handlers
+never stall the event loop while waiting on the database
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from db_pool import PoolTimeout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """All statements of one request on one connection, committed once
+
+    The connection is checked out lazily on the first statement, so work done
+    before it (session lookup, validation) does not hold a pool slot.
+    """
+
+    def __init__(self, database: "AsyncDatabase"):
+        self._db = database
+        self._slot = None
+        self.connection = None
+        self.statements = 0
+        self.committed = False
+        self._after_finish: List[Callable[[], None]] = []
+
+    def after_finish(self, callback: Callable[[], None]):
+        """Run callback once the transaction has committed or rolled back"""
+        self._after_finish.append(callback)
+
+    async def _begin(self):
+        self._slot = self._db._connection_slot()
+        await self._slot.__aenter__()
+        try:
+            connection = await self._db.run(self._db._acquire)
+        except BaseException:
+            await self._slot.__aexit__(None, None, None)
+            self._slot = None
+            raise
+        try:
+            await self._db.run(connection.start_transaction)
+        except BaseException:
+            connection.close()
+            await self._slot.__aexit__(None, None, None)
+            self._slot = None
+            raise
+        self.connection = connection
+
+    async def _finish(self, commit: bool):
+        try:
+            if self.connection is None:
+                # Nothing reached the database, so there is nothing to lose
+                self.committed = commit
+                return
+            connection = self.connection
+            try:
+                if commit:
+                    await self._db.run(connection.commit)
+                    self.committed = True
+                else:
+                    try:
+                        await self._db.run(connection.rollback)
+                    except Exception as e:
+                        logger.error(f"Rollback failed, discarding connection: {e}")
+                        connection.invalidate()
+            finally:
+                self.connection = None
+                connection.close()
+                await self._slot.__aexit__(None, None, None)
+                self._slot = None
+        finally:
+            callbacks, self._after_finish = self._after_finish, []
+            for callback in callbacks:
+                callback()
+
+    async def _execute(self, query: str, params: tuple = None, **kwargs) -> Any:
+        if self.connection is None:
+            await self._begin()
+        self.statements += 1
+        return await self._db.run(self._db._execute, query, params, connection=self.connection, **kwargs)
+
+    async def fetch_one(self, query: str, params: tuple = None) -> Optional[Dict]:
+        """Return the first row of a query or None"""
+        return await self._execute(query, params, fetch_one=True)
+
+    async def fetch_all(self, query: str, params: tuple = None) -> List[Dict]:
+        """Return all rows of a query"""
+        return await self._execute(query, params, fetch=True)
+
+    async def execute(self, query: str, params: tuple = None) -> int:
+        """Run a write statement inside the transaction"""
+        return await self._execute(query, params)
+
+    async def execute_many(self, query: str, rows: List[tuple], batch_size: int = None) -> int:
+        """Batched write of many rows inside the transaction"""
+        if not rows:
+            return 0
+        if self.connection is None:
+            await self._begin()
+        self.statements += 1
+        return await self._db.run(
+            self._db._execute_many, query, rows, batch_size, connection=self.connection
+        )
+
+
+class AsyncDatabase:
+    """Awaitable query API on top of a synchronous execute function"""
+
+    def __init__(
+        self,
+        execute_fn: Callable[..., Any],
+        acquire_fn: Callable[[], Any],
+        execute_many_fn: Callable[..., Any] = None,
+        max_workers: int = 15,
+        acquire_timeout: float = 30.0,
+    ):
+        self._execute = execute_fn
+        self._execute_many = execute_many_fn
+        self._acquire = acquire_fn
+        self.max_workers = max_workers
+        self.acquire_timeout = acquire_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._slots = None
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the database executor"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (request state) into the worker thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    @asynccontextmanager
+    async def _connection_slot(self):
+        # Admission is decided on the event loop so worker threads never sit
+        # blocked on an exhausted pool while a transaction needs a thread
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"Timed out after {self.acquire_timeout}s waiting for a database slot")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    async def fetch_one(self, query: str, params: tuple = None) -> Optional[Dict]:
+        """Return the first row of a query or None"""
+        async with self._connection_slot():
+            return await self.run(self._execute, query, params, fetch_one=True)
+
+    async def fetch_all(self, query: str, params: tuple = None) -> List[Dict]:
+        """Return all rows of a query"""
+        async with self._connection_slot():
+            return await self.run(self._execute, query, params, fetch=True)
+
+    async def execute(self, query: str, params: tuple = None) -> int:
+        """Run a write statement and return the affected row count"""
+        async with self._connection_slot():
+            return await self.run(self._execute, query, params)
+
+    async def execute_many(self, query: str, rows: List[tuple], batch_size: int = None) -> int:
+        """Write many rows in batches inside one transaction"""
+        if not rows:
+            return 0
+        async with self._connection_slot():
+            return await self.run(self._execute_many, query, rows, batch_size)
+
+    async def stream(self, query: str, params: tuple = None, chunk_size: int = 500) -> AsyncIterator[List[Dict]]:
+        """Yield rows in chunks from an unbuffered cursor
+
+        Rows are pulled from the server as the consumer iterates, so memory
+        stays bounded by chunk_size however large the table is. The
+        connection is held until the stream is exhausted or closed.
+        """
+        async with self._connection_slot():
+            # The statement lets the acquire function route the read
+            connection = await self.run(self._acquire, query)
+            exhausted = False
+            try:
+                cursor = await self.run(connection.cursor, dictionary=True, buffered=False)
+                await self.run(cursor.execute, query, params)
+                while True:
+                    rows = await self.run(cursor.fetchmany, chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    yield rows
+                await self.run(cursor.close)
+            finally:
+                if exhausted:
+                    connection.close()
+                else:
+                    # Unread rows are still on the wire; drop the connection
+                    connection.invalidate()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Unit of work: one pooled connection, commit on success, rollback on error"""
+        uow = UnitOfWork(self)
+        try:
+            yield uow
+        except BaseException:
+            await uow._finish(commit=False)
+            raise
+        else:
+            await uow._finish(commit=True)
+
+    def shutdown(self):
+        """Stop accepting work and wait for running queries to finish"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Database Connection Pool for ThriveRemoteOS
+Keeps MySQL connections open between queries so handlers stop paying
+TCP setup and authentication on every statement
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout"""
+
+
+def default_ping(connection) -> bool:
+    """Check that a MySQL connection is still usable"""
+    try:
+        connection.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+class StatementCache:
+    """LRU of server-side prepared statements for one connection, keyed by SQL text"""
+
+    def __init__(self, raw_connection, capacity: int, counters: Dict[str, int], lock: threading.Lock):
+        self._raw = raw_connection
+        self.capacity = capacity
+        self._cursors = OrderedDict()  # sql text -> (canonical sql object, prepared cursor)
+        self._counters = counters
+        self._lock = lock
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def checkout(self, query: str):
+        """Return (prepared cursor, sql) for a statement, preparing it on a miss
+
+        The returned sql is the exact object the cursor was prepared with;
+        mysql.connector only skips re-preparing when it is passed back.
+        """
+        entry = self._cursors.get(query)
+        if entry is not None:
+            self._cursors.move_to_end(query)
+            self._count("hits")
+            return entry[1], entry[0]
+
+        self._count("misses")
+        cursor = self._raw.cursor(prepared=True, dictionary=True)
+        self._cursors[query] = (query, cursor)
+        if len(self._cursors) > self.capacity:
+            _, (_, evicted) = self._cursors.popitem(last=False)
+            self._close_cursor(evicted)
+            self._count("evictions")
+        return cursor, query
+
+    def discard(self, query: str):
+        """Forget a statement whose cursor hit an error"""
+        entry = self._cursors.pop(query, None)
+        if entry is not None:
+            self._close_cursor(entry[1])
+
+    def clear(self):
+        for _, cursor in self._cursors.values():
+            self._close_cursor(cursor)
+        self._cursors.clear()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()  # deallocates the server-side statement
+        except Exception as e:
+            logger.debug(f"Error closing prepared statement: {e}")
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool"""
+
+    def __init__(self, pool: "ConnectionPool", raw_connection, created_at: float):
+        self._pool = pool
+        self._raw = raw_connection
+        self._created_at = created_at
+        self._checked_out = True
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def statement_cache(self) -> Optional[StatementCache]:
+        """Prepared statement cache bound to the underlying connection, if enabled"""
+        return self._pool._statement_cache_for(self._raw)
+
+    def invalidate(self):
+        """Drop this connection instead of returning it to the pool"""
+        if self._checked_out:
+            self._checked_out = False
+            self._pool._discard(self._raw, checked_out=True)
+
+    def close(self):
+        """Return the connection to the pool"""
+        if not self._checked_out:
+            return
+        # Never hand out a connection with a half-finished transaction
+        if getattr(self._raw, "in_transaction", False):
+            try:
+                self._raw.rollback()
+            except Exception:
+                self.invalidate()
+                return
+        self._checked_out = False
+        self._pool._release(self._raw, self._created_at)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe connection pool with overflow, idle timeout and pre-ping"""
+
+    def __init__(
+        self,
+        creator: Callable[[], Any],
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        pre_ping: bool = True,
+        ping: Callable[[Any], bool] = default_ping,
+        statement_cache_size: int = 0,
+    ):
+        self.creator = creator
+        self.pool_size = max(1, pool_size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.ping = ping
+        self.statement_cache_size = max(0, statement_cache_size)
+
+        self._idle = deque()  # (raw_connection, created_at, returned_at)
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Prepared statement caches live as long as their raw connection
+        self._statement_caches: Dict[int, StatementCache] = {}
+        self._statement_lock = threading.Lock()
+        self._statement_counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self._stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "overflow_created": 0,
+            "idle_expired": 0,
+            "ping_failures": 0,
+            "timeouts": 0,
+            "waits": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+        }
+
+    @property
+    def max_connections(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, creating one if the pool has room"""
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                candidate = None
+                create = False
+
+                if self._idle:
+                    candidate = self._idle.pop()  # most recently used first
+                elif self._open < self.max_connections:
+                    self._open += 1
+                    create = True
+                else:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a connection "
+                            f"({self._open}/{self.max_connections} in use)"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                raw = self._create()
+                return self._checkout(raw, time.time(), start, waited)
+
+            raw, created_at, returned_at = candidate
+            if self.idle_timeout and time.time() - returned_at > self.idle_timeout:
+                self._count("idle_expired")
+                self._discard(raw, checked_out=False)
+                continue
+            if self.pre_ping and not self.ping(raw):
+                self._count("ping_failures")
+                self._discard(raw, checked_out=False)
+                continue
+
+            return self._checkout(raw, created_at, start, waited)
+
+    def _count(self, key: str):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _create(self):
+        try:
+            raw = self.creator()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["connections_created"] += 1
+            if self._open > self.pool_size:
+                self._stats["overflow_created"] += 1
+        return raw
+
+    def _checkout(self, raw, created_at: float, start: float, waited: bool) -> PooledConnection:
+        wait_ms = (time.perf_counter() - start) * 1000
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total_ms"] += wait_ms
+            self._stats["wait_time_max_ms"] = max(self._stats["wait_time_max_ms"], wait_ms)
+            if waited:
+                self._stats["waits"] += 1
+        return PooledConnection(self, raw, created_at)
+
+    def _release(self, raw, created_at: float):
+        with self._cond:
+            self._stats["checkins"] += 1
+            # Overflow connections are closed once the steady-state pool is full
+            if not self._closed and len(self._idle) < self.pool_size:
+                self._idle.append((raw, created_at, time.time()))
+                self._cond.notify()
+                return
+        self._discard(raw, checked_out=False)
+
+    def _statement_cache_for(self, raw) -> Optional[StatementCache]:
+        if not self.statement_cache_size:
+            return None
+        with self._statement_lock:
+            cache = self._statement_caches.get(id(raw))
+            if cache is None:
+                cache = StatementCache(raw, self.statement_cache_size,
+                                       self._statement_counters, self._statement_lock)
+                self._statement_caches[id(raw)] = cache
+            return cache
+
+    def _discard(self, raw, checked_out: bool):
+        if checked_out:
+            with self._cond:
+                self._stats["checkins"] += 1
+        # The server frees prepared statements when the connection closes
+        with self._statement_lock:
+            self._statement_caches.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+        with self._cond:
+            self._open -= 1
+            self._stats["connections_closed"] += 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for raw, _, _ in idle:
+            self._discard(raw, checked_out=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool sizing and checkout metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            open_connections = self._open
+
+        with self._statement_lock:
+            statement_cache = dict(self._statement_counters)
+            statement_cache["cached_statements"] = sum(len(c) for c in self._statement_caches.values())
+        lookups = statement_cache["hits"] + statement_cache["misses"]
+        statement_cache["hit_rate"] = round(statement_cache["hits"] / lookups, 4) if lookups else 0.0
+        statement_cache["capacity_per_connection"] = self.statement_cache_size
+
+        checkouts = stats["checkouts"]
+        stats.update({
+            "statement_cache": statement_cache,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "open_connections": open_connections,
+            "idle_connections": idle,
+            "in_use_connections": open_connections - idle,
+            "overflow_in_use": max(0, open_connections - self.pool_size),
+            "wait_time_avg_ms": round(stats["wait_time_total_ms"] / checkouts, 3) if checkouts else 0.0,
+            "wait_time_total_ms": round(stats["wait_time_total_ms"], 3),
+            "wait_time_max_ms": round(stats["wait_time_max_ms"], 3),
+        })
+        return stats
+
+
+def create_pool_from_env(creator: Callable[[], Any], prefix: str = "DB_POOL",
+                         statement_cache_size: Optional[int] = None) -> ConnectionPool:
+    """Build a pool sized from environment variables"""
+    if statement_cache_size is None:
+        statement_cache_size = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 32))
+    return ConnectionPool(
+        creator=creator,
+        pool_size=int(os.environ.get(f"{prefix}_SIZE", 5)),
+        max_overflow=int(os.environ.get(f"{prefix}_MAX_OVERFLOW", 10)),
+        timeout=float(os.environ.get(f"{prefix}_TIMEOUT", 30)),
+        idle_timeout=float(os.environ.get(f"{prefix}_IDLE_TIMEOUT", 300)),
+        pre_ping=os.environ.get(f"{prefix}_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        statement_cache_size=statement_cache_size,
+    )
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Read Replica Routing for ThriveRemoteOS
+Sends read-only queries to healthy MySQL replicas while keeping a user's
+reads on the primary right after their own writes
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from db_pool import ConnectionPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RoutingState:
+    """Per-request routing facts shared with the worker threads running its queries"""
+
+    def __init__(self):
+        self.user_id: Optional[str] = None
+        self.wrote = False
+
+
+_routing_state: contextvars.ContextVar[Optional[RoutingState]] = contextvars.ContextVar(
+    "routing_state", default=None
+)
+
+
+def begin_request() -> contextvars.Token:
+    """Start a fresh routing scope for one request"""
+    return _routing_state.set(RoutingState())
+
+
+def end_request(token: contextvars.Token):
+    _routing_state.reset(token)
+
+
+@asynccontextmanager
+async def read_primary():
+    """Send every read in the block to the primary
+
+    For background jobs, which act on what they read, and for lookups made
+    before the user is known: nothing else keeps them off a lagging replica.
+    """
+    state = RoutingState()
+    state.wrote = True
+    token = _routing_state.set(state)
+    try:
+        yield
+    finally:
+        _routing_state.reset(token)
+
+
+def is_read_query(query: str) -> bool:
+    """Plain SELECTs are safe for a replica; locking reads are not"""
+    head = query.lstrip()[:6].upper()
+    if head != "SELECT":
+        return False
+    upper = query.upper()
+    return "FOR UPDATE" not in upper and "LOCK IN SHARE MODE" not in upper
+
+
+class Replica:
+    def __init__(self, name: str, pool: ConnectionPool):
+        self.name = name
+        self.pool = pool
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas with read-your-writes stickiness"""
+
+    def __init__(
+        self,
+        replicas: Dict[str, ConnectionPool],
+        max_lag_seconds: float = 2.0,
+        sticky_seconds: float = 5.0,
+        check_interval: float = 5.0,
+    ):
+        self.replicas: List[Replica] = [Replica(name, pool) for name, pool in replicas.items()]
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._recent_writers: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def bind_user(self, user_id: str):
+        """Attach the authenticated user to the current request's routing scope"""
+        state = _routing_state.get()
+        if state is not None:
+            state.user_id = user_id
+
+    def note_write(self):
+        """Pin the rest of this request, and the user's next few seconds, to the primary"""
+        state = _routing_state.get()
+        if state is None:
+            return
+        state.wrote = True
+        if state.user_id:
+            now = time.monotonic()
+            with self._lock:
+                self._recent_writers[state.user_id] = now
+                if len(self._recent_writers) > 10000:
+                    cutoff = now - self.sticky_seconds
+                    self._recent_writers = {
+                        user: ts for user, ts in self._recent_writers.items() if ts > cutoff
+                    }
+
+    def _must_read_primary(self) -> bool:
+        state = _routing_state.get()
+        if state is None:
+            return False
+        if state.wrote:
+            return True
+        if state.user_id:
+            with self._lock:
+                last_write = self._recent_writers.get(state.user_id)
+            if last_write is not None and time.monotonic() - last_write < self.sticky_seconds:
+                return True
+        return False
+
+    def replica_for(self, query: str) -> Optional[Replica]:
+        """Pick a replica for this statement, or None to use the primary"""
+        if not self.enabled or not is_read_query(query):
+            return None
+        if self._must_read_primary():
+            self.sticky_reads += 1
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+        self.primary_reads += 1
+        return None
+
+    def mark_unhealthy(self, replica: Replica, reason: str):
+        if replica.healthy:
+            logger.warning(f"Replica {replica.name} taken out of rotation: {reason}")
+        replica.healthy = False
+        replica.last_error = reason
+
+    def check_replica(self, replica: Replica):
+        """Measure replication lag on one replica (blocking)"""
+        connection = None
+        cursor = None
+        try:
+            connection = replica.pool.acquire()
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                # MySQL < 8.0.22 and MariaDB
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+            replica.last_check = time.time()
+
+            if not status:
+                raise RuntimeError("replication is not configured")
+            lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+            if lag is None:
+                raise RuntimeError("replication threads are stopped")
+
+            replica.lag_seconds = float(lag)
+            if replica.lag_seconds > self.max_lag_seconds:
+                self.mark_unhealthy(replica, f"lag {replica.lag_seconds:.0f}s > {self.max_lag_seconds:.0f}s")
+            else:
+                if not replica.healthy:
+                    logger.info(f"Replica {replica.name} back in rotation (lag {replica.lag_seconds:.0f}s)")
+                replica.healthy = True
+                replica.last_error = None
+        except Exception as e:
+            replica.last_check = time.time()
+            self.mark_unhealthy(replica, str(e))
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if connection:
+                connection.close()
+
+    async def _health_loop(self):
+        while True:
+            for replica in self.replicas:
+                await asyncio.to_thread(self.check_replica, replica)
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        """Begin periodic health checks on the running event loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            replica.pool.close_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_lag_seconds": self.max_lag_seconds,
+            "sticky_seconds": self.sticky_seconds,
+            "primary_fallback_reads": self.primary_reads,
+            "sticky_primary_reads": self.sticky_reads,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "reads": replica.reads,
+                    "last_check": replica.last_check,
+                    "last_error": replica.last_error,
+                    "pool": replica.pool.stats(),
+                }
+                for replica in self.replicas
+            ],
+        }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Hot Row Write Absorption for ThriveRemoteOS
+Counter increments and assignments aimed at heavily shared per-user rows (the
+anonymous demo_user) are coalesced in memory and flushed as one UPDATE per
+row per interval, instead of every request queueing on the same row lock
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Only these users columns may be buffered by default; names are interpolated into SQL
+COUNTER_COLUMNS = frozenset({"productivity_score", "achievements_unlocked", "total_sessions"})
+ASSIGNABLE_COLUMNS = frozenset({"current_savings", "last_active"})
+
+
+class PendingWrites:
+    """Summed increments and last-wins assignments for one row"""
+
+    def __init__(self):
+        self.increments: Dict[str, int] = {}
+        self.assignments: Dict[str, Any] = {}
+
+    def merge(self, other: "PendingWrites"):
+        """Fold an older batch back in underneath this one"""
+        for column, delta in other.increments.items():
+            self.increments[column] = self.increments.get(column, 0) + delta
+        for column, value in other.assignments.items():
+            self.assignments.setdefault(column, value)
+
+
+class HotRowBuffer:
+    """Write-behind buffer for a fixed set of hot user ids
+
+    Each worker process keeps its own buffer and flushes its own deltas, so
+    concurrent workers never contend in memory and only meet at the row once
+    per flush interval.
+    """
+
+    def __init__(self, write_fn: Callable[[str, Tuple], Awaitable[int]],
+                 user_ids: Iterable[str], flush_interval: float = 1.0,
+                 on_flushed: Optional[Callable[[str], None]] = None,
+                 table: str = "users", key_column: str = "id",
+                 counter_columns: Iterable[str] = COUNTER_COLUMNS,
+                 assignable_columns: Iterable[str] = ASSIGNABLE_COLUMNS,
+                 build_write: Optional[Callable[[str, "PendingWrites"], Tuple[str, Tuple]]] = None):
+        self._write = write_fn
+        self.user_ids = frozenset(user_ids)
+        self.flush_interval = flush_interval
+        self._on_flushed = on_flushed
+        self.table = table
+        self.key_column = key_column
+        self.counter_columns = frozenset(counter_columns)
+        self.assignable_columns = frozenset(assignable_columns)
+        # Tables whose rows may not exist yet pass an upsert here
+        self._build_write = build_write or self.build_update
+        self._pending: Dict[str, PendingWrites] = {}
+        self._in_flight: Dict[str, PendingWrites] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.absorbed = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def is_hot(self, user_id: str) -> bool:
+        return user_id in self.user_ids
+
+    def _pending_for(self, user_id: str) -> PendingWrites:
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = self._pending[user_id] = PendingWrites()
+        return pending
+
+    def increment(self, user_id: str, column: str, delta: int):
+        if column not in self.counter_columns:
+            raise ValueError(f"{column} is not a bufferable counter")
+        with self._lock:
+            pending = self._pending_for(user_id)
+            pending.increments[column] = pending.increments.get(column, 0) + delta
+            self.absorbed += 1
+
+    def assign(self, user_id: str, column: str, value: Any):
+        if column not in self.assignable_columns:
+            raise ValueError(f"{column} is not a bufferable column")
+        with self._lock:
+            self._pending_for(user_id).assignments[column] = value
+            self.absorbed += 1
+
+    def overlay(self, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The row as it will read once buffered writes are flushed"""
+        if row is None or row.get(self.key_column) not in self.user_ids:
+            return row
+        user_id = row[self.key_column]
+        with self._lock:
+            batches = [b for b in (self._in_flight.get(user_id), self._pending.get(user_id)) if b]
+        if not batches:
+            return row
+        row = dict(row)
+        for batch in batches:
+            for column, delta in batch.increments.items():
+                row[column] = (row.get(column) or 0) + delta
+            row.update(batch.assignments)
+        return row
+
+    def build_update(self, user_id: str, pending: PendingWrites) -> Tuple[str, Tuple]:
+        sets = [f"{column} = {column} + %s" for column in pending.increments]
+        sets += [f"{column} = %s" for column in pending.assignments]
+        params = list(pending.increments.values()) + list(pending.assignments.values())
+        query = f"UPDATE {self.table} SET {', '.join(sets)} WHERE {self.key_column} = %s"
+        return query, tuple(params) + (user_id,)
+
+    async def flush(self) -> int:
+        """One write per buffered row; failed rows are retried next interval"""
+        async with self._flush_lock:
+            with self._lock:
+                self._in_flight, self._pending = self._pending, {}
+                batches = list(self._in_flight.items())
+            if not batches:
+                return 0
+
+            started = time.perf_counter()
+            written = 0
+            for user_id, pending in batches:
+                query, params = self._build_write(user_id, pending)
+                try:
+                    written += await self._write(query, params) or 0
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Hot row flush of {self.table} for {user_id} failed, retrying next interval: {e}")
+                    with self._lock:
+                        self._pending_for(user_id).merge(pending)
+                        self._in_flight.pop(user_id, None)
+                    continue
+                with self._lock:
+                    self._in_flight.pop(user_id, None)
+                if self._on_flushed is not None:
+                    self._on_flushed(user_id)
+
+            self.flushes += 1
+            self.rows_written += written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return written
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Begin periodic flushing on the running event loop"""
+        if self.user_ids and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "table": self.table,
+            "hot_users": sorted(self.user_ids),
+            "pending_rows": pending,
+            "writes_absorbed": self.absorbed,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "flush_interval_seconds": self.flush_interval,
+        }
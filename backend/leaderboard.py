@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Productivity Leaderboard for ThriveRemoteOS
+Users ordered by productivity_score in an indexable skip list, kept current
+from committed scores and rebuilt from the database periodically
+"""
+
+import asyncio
+import random
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from db_replicas import read_primary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Last:
+    """Sorts after every key; the value of the skip list's tail"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __ge__(self, other):
+        return True
+
+
+_TAIL_VALUE = _Last()
+
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths
+
+
+class IndexableSkipList:
+    """Sorted values with O(log n) insert, remove, position and lookup by position
+
+    width[level] is how many positions following next[level] skips, which is
+    what makes positions computable on the way down.
+    """
+
+    def __init__(self, max_levels: int = 24):
+        self.max_levels = max_levels
+        self._tail = _Node(_TAIL_VALUE, [], [])
+        self._head = _Node(None, [self._tail] * max_levels, [1] * max_levels)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _height(self) -> int:
+        # 1 + trailing zero bits: geometric with p = 1/2, capped at max_levels
+        bits = random.getrandbits(self.max_levels - 1) | (1 << (self.max_levels - 1))
+        return (bits & -bits).bit_length()
+
+    @classmethod
+    def from_sorted(cls, values: Iterable, max_levels: int = 24) -> "IndexableSkipList":
+        """Build in one pass from values already in order"""
+        skiplist = cls(max_levels)
+        last = [skiplist._head] * max_levels
+        last_position = [0] * max_levels
+        position = 0
+        for position, value in enumerate(values, 1):
+            height = skiplist._height()
+            node = _Node(value, [skiplist._tail] * height, [0] * height)
+            for level in range(height):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(max_levels):
+            last[level].width[level] = position + 1 - last_position[level]
+        skiplist._size = position
+        return skiplist
+
+    def insert(self, value):
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = self._height()
+        new_node = _Node(value, [None] * height, [None] * height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.max_levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, value):
+        chain = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._tail or target.value != value:
+            raise KeyError(value)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, value) -> int:
+        """0-based position of value"""
+        node = self._head
+        position = 0
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is self._tail or target.value != value:
+            raise KeyError(value)
+        return position
+
+    def slice(self, start: int, count: int) -> List:
+        """Up to count values from position start onwards"""
+        if start < 0 or start >= self._size or count <= 0:
+            return []
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        values = []
+        while node is not self._tail and len(values) < count:
+            values.append(node.value)
+            node = node.next[0]
+        return values
+
+
+class Leaderboard:
+    """Users with a positive productivity_score, best first
+
+    Ties are ordered by user id so every user has a stable rank. Each worker
+    applies the scores its own writes commit, and rebuilds from the
+    database every rebuild_interval to pick up the other workers' writes.
+    Scores only grow, so a user is only ever moved up to a higher score:
+    a committed score that a rebuild's scan already saw, or one that
+    arrives after a newer one, changes nothing. Shared accounts (excluded)
+    are never ranked.
+    """
+
+    def __init__(self, rebuild_interval: float = 600.0, excluded: Iterable[str] = ()):
+        self.rebuild_interval = rebuild_interval
+        self.excluded = frozenset(excluded)
+        self._scores: Dict[str, int] = {}
+        self._ranking = IndexableSkipList()
+        self._lock = threading.Lock()
+        # Scores applied while a rebuild is reading, replayed onto its result
+        self._replay: Optional[List[Dict[str, int]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.scores_applied = 0
+        self.rebuilds = 0
+        self.last_rebuild_at: Optional[datetime] = None
+        self.last_rebuild_ms = 0.0
+
+    @staticmethod
+    def _key(user_id: str, score: int) -> Tuple[int, str]:
+        return (-score, user_id)
+
+    def _apply(self, scores: Dict[str, int], ranking: IndexableSkipList, committed: Dict[str, int]):
+        for user_id, new in committed.items():
+            old = scores.get(user_id, 0)
+            if new <= old or user_id in self.excluded:
+                continue
+            if old > 0:
+                ranking.remove(self._key(user_id, old))
+            ranking.insert(self._key(user_id, new))
+            scores[user_id] = new
+
+    def apply(self, committed: Dict[str, int]):
+        """Move users up to the scores their writes committed"""
+        with self._lock:
+            self._apply(self._scores, self._ranking, committed)
+            if self._replay is not None:
+                self._replay.append(dict(committed))
+            self.scores_applied += len(committed)
+
+    async def rebuild(self, loader: Callable[[], AsyncIterator[List[Tuple[str, int]]]]):
+        """Replace the ranking with (user_id, score) rows streamed from the database"""
+        started = time.perf_counter()
+        with self._lock:
+            self._replay = []
+        try:
+            scores: Dict[str, int] = {}
+            async with read_primary():
+                async for rows in loader():
+                    for user_id, score in rows:
+                        if score and score > 0 and user_id not in self.excluded:
+                            scores[user_id] = int(score)
+            # Sorting and linking hundreds of thousands of users takes a
+            # while; keep it off the event loop
+            ranking = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: IndexableSkipList.from_sorted(
+                    sorted(self._key(user_id, score) for user_id, score in scores.items())
+                )
+            )
+            with self._lock:
+                for committed in self._replay:
+                    self._apply(scores, ranking, committed)
+                self._scores, self._ranking = scores, ranking
+        finally:
+            with self._lock:
+                self._replay = None
+        self.rebuilds += 1
+        self.last_rebuild_at = datetime.now()
+        self.last_rebuild_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Leaderboard rebuilt with {len(scores)} users in {self.last_rebuild_ms:.0f} ms")
+
+    def _entry(self, position: int, key: Tuple[int, str]) -> Dict[str, Any]:
+        return {"rank": position + 1, "user_id": key[1], "score": -key[0]}
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = self._ranking.slice(offset, limit)
+        return [self._entry(offset + i, key) for i, key in enumerate(keys)]
+
+    def rank(self, user_id: str) -> Dict[str, Any]:
+        """A user's rank; users without points share the rank after the last ranked user"""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return {"rank": len(self._ranking) + 1, "user_id": user_id, "score": 0}
+            return self._entry(self._ranking.index(self._key(user_id, score)), self._key(user_id, score))
+
+    def around(self, user_id: str, radius: int = 5) -> List[Dict[str, Any]]:
+        """The user's entry with up to radius users on either side"""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                start = max(0, len(self._ranking) - radius)
+            else:
+                start = max(0, self._ranking.index(self._key(user_id, score)) - radius)
+            keys = self._ranking.slice(start, 2 * radius + 1)
+        return [self._entry(start + i, key) for i, key in enumerate(keys)]
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    async def _rebuild_loop(self, loader):
+        while True:
+            await asyncio.sleep(self.rebuild_interval)
+            try:
+                await self.rebuild(loader)
+            except Exception as e:
+                logger.error(f"Leaderboard rebuild failed: {e}")
+
+    def start(self, loader):
+        """Rebuild periodically on the running event loop"""
+        if self._task is None and self.rebuild_interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._rebuild_loop(loader))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ranked_users": len(self._ranking),
+            "scores_applied": self.scores_applied,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_at": self.last_rebuild_at.isoformat() if self.last_rebuild_at else None,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 3),
+            "rebuild_interval_seconds": self.rebuild_interval,
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Password Hashing for ThriveRemoteOS
+PBKDF2-SHA256 password hashes computed in a worker process pool, with a
+concurrency cap and a bounded wait queue so login bursts cannot stall the API
+"""
+
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import secrets
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PBKDF2_ITERATIONS = 100000
+
+
+def hash_password(password: str) -> str:
+    """Hash password with salt"""
+    salt = secrets.token_hex(16)
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), PBKDF2_ITERATIONS).hex() + ':' + salt
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verify password against hash"""
+    try:
+        stored_hash, salt = password_hash.split(':')
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), PBKDF2_ITERATIONS).hex()
+        return hmac.compare_digest(candidate, stored_hash)
+    except Exception:
+        return False
+
+
+def _warm_up() -> bool:
+    return True
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing wait queue is full or the wait times out"""
+
+
+class PasswordHasher:
+    """Runs hash/verify in a process pool behind admission control"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64,
+                 queue_timeout: float = 10.0, sample_size: int = 512):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._wait_samples = deque(maxlen=sample_size)
+        self._total_samples = deque(maxlen=sample_size)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs executor threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor):
+        with self._executor_lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self):
+        """Spawn the worker processes now so the first login does not pay for it"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.max_workers)))
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        # Counted synchronously: the semaphore only reflects an acquire once it runs
+        if self._waiting + self._running >= self.max_workers + self.max_pending:
+            self.rejected += 1
+            raise HashingOverloaded("Password hashing queue is full")
+
+        started = time.perf_counter()
+        self._waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self._waiting)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HashingOverloaded(f"Waited more than {self.queue_timeout}s for a hashing worker")
+        finally:
+            self._waiting -= 1
+
+        queued = time.perf_counter()
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool and retry once
+                logger.error("Password hashing worker died, restarting the process pool")
+                self._reset_executor(executor)
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._running -= 1
+            self._slots.release()
+            finished = time.perf_counter()
+            self.completed += 1
+            self._wait_samples.append((queued - started) * 1000)
+            self._total_samples.append((finished - started) * 1000)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(verify_password, password, password_hash)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, float]:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "p50_ms": round(ordered[int(0.50 * (len(ordered) - 1))], 3),
+            "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            "max_ms": round(ordered[-1], 3),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "queue_wait": self._percentiles(self._wait_samples),
+            "latency": self._percentiles(self._total_samples),
+        }
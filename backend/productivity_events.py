@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Productivity Event Pipeline for ThriveRemoteOS
+Handlers queue productivity events; a background writer inserts their logs
+in batches and applies one summed productivity_score delta per user
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from async_db import AsyncDatabase
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INSERT_LOGS = """
+    INSERT INTO productivity_logs (id, user_id, action, timestamp, points, metadata)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+UPDATE_SCORES = "UPDATE users SET productivity_score = productivity_score + %s WHERE id = %s"
+
+
+class ProductivityEvent:
+    """One productivity_logs row plus when it was queued"""
+
+    __slots__ = ("id", "user_id", "action", "timestamp", "points", "metadata", "queued_at")
+
+    def __init__(self, user_id: str, action: str, points: int, metadata: Dict[str, Any]):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.action = action
+        self.timestamp = datetime.now()
+        self.points = points
+        self.metadata = json.dumps(metadata)
+        self.queued_at = 0.0
+
+    def row(self) -> Tuple:
+        return (self.id, self.user_id, self.action, self.timestamp, self.points, self.metadata)
+
+
+class ProductivityEventWriter:
+    """Bounded queue of productivity events drained by one background writer
+
+    Callers reserve queue capacity before their transaction commits and wait
+    up to enqueue_timeout when the queue is full; past that the event is
+    written synchronously in the caller's own transaction instead, so slow
+    flushes slow producers down rather than losing events. Logs and score
+    deltas of a batch commit together and a failed batch is retried whole.
+    """
+
+    def __init__(
+        self,
+        database: AsyncDatabase,
+        on_flushed: Optional[Callable[[Dict[str, int]], None]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 0.5,
+        retry_backoff: float = 1.0,
+    ):
+        self._db = database
+        self._on_flushed = on_flushed
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        # The same events in the same order as _queue, readable for stats
+        self._queued: deque = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[ProductivityEvent] = []
+        self._writing = False
+        self._closing = False
+        # Points queued or being written, so reads can include them
+        self._pending_scores: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.reserved = 0
+        self.queue_high_water = 0
+        self.events_written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.written_inline = 0
+        self.backpressure_waits = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    async def submit(self, user_id: str, action: str, points: int, metadata: Dict[str, Any],
+                     uow) -> ProductivityEvent:
+        """Queue an event once uow commits
+
+        uow is the caller's transaction, or None if it holds none. It is
+        required so that the full-queue fallback writes in that transaction
+        rather than taking a second connection while the caller holds one.
+        """
+        event = ProductivityEvent(user_id, action, points, metadata)
+        if not self.running or not await self._reserve():
+            self.written_inline += 1
+            await self._write([event], uow)
+            return event
+
+        if uow is None:
+            self._push(event)
+        else:
+            uow.after_finish(lambda: self._push(event) if uow.committed else self._release(1))
+        return event
+
+    async def _reserve(self) -> bool:
+        if self._slots.locked():
+            self.backpressure_waits += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.reserved += 1
+        self.queue_high_water = max(self.queue_high_water, self.reserved)
+        return True
+
+    def _release(self, count: int):
+        self.reserved -= count
+        for _ in range(count):
+            self._slots.release()
+
+    def _push(self, event: ProductivityEvent):
+        event.queued_at = time.monotonic()
+        with self._lock:
+            self._pending_scores[event.user_id] += event.points
+        self._queue.put_nowait(event)
+        self._queued.append(event)
+
+    def _dequeued(self, event: ProductivityEvent) -> ProductivityEvent:
+        self._queued.popleft()
+        return event
+
+    def overlay(self, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """A users row with the points of queued events already added"""
+        if row is None:
+            return row
+        with self._lock:
+            pending = self._pending_scores.get(row.get("id"))
+        if not pending:
+            return row
+        row = dict(row)
+        row["productivity_score"] = (row.get("productivity_score") or 0) + pending
+        return row
+
+    def oldest_unwritten(self) -> Optional[datetime]:
+        """Earliest timestamp among events queued or being written"""
+        events = list(self._batch)
+        events.extend(self._queued)
+        return min((event.timestamp for event in events), default=None)
+
+    async def _write(self, batch: List[ProductivityEvent], uow=None):
+        """Insert a batch's logs and one score delta per user, in uow or a new transaction"""
+        if uow is None:
+            async with self._db.transaction() as uow:
+                return await self._write(batch, uow)
+
+        deltas: Dict[str, int] = defaultdict(int)
+        for event in batch:
+            deltas[event.user_id] += event.points
+        await uow.execute_many(INSERT_LOGS, [event.row() for event in batch])
+        # Sorted so concurrent batches lock users rows in the same order
+        changed = sorted(user_id for user_id, delta in deltas.items() if delta)
+        await uow.execute_many(UPDATE_SCORES, [(deltas[user_id], user_id) for user_id in changed])
+        if self._on_flushed is not None and changed:
+            # The rows are locked by the UPDATE, so these are the scores this
+            # transaction commits, including every earlier write to them
+            placeholders = ", ".join(["%s"] * len(changed))
+            rows = await uow.fetch_all(
+                f"SELECT id, productivity_score FROM users WHERE id IN ({placeholders})", tuple(changed)
+            )
+            scores = {row["id"]: row["productivity_score"] or 0 for row in rows}
+            uow.after_finish(lambda: self._on_flushed(scores) if uow.committed else None)
+
+    async def _flush(self, batch: List[ProductivityEvent]) -> bool:
+        started = time.perf_counter()
+        self._writing = True
+        try:
+            await self._write(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Productivity event batch of {len(batch)} failed, retrying: {e}")
+            return False
+        finally:
+            self._writing = False
+
+        now = time.monotonic()
+        with self._lock:
+            for event in batch:
+                self._pending_scores[event.user_id] -= event.points
+                if not self._pending_scores[event.user_id]:
+                    del self._pending_scores[event.user_id]
+        self._release(len(batch))
+        self.batches += 1
+        self.events_written += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.last_lag_ms = (now - min(event.queued_at for event in batch)) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        return True
+
+    async def _collect(self):
+        """Fill self._batch: wait for one event, then up to flush_interval for more"""
+        loop = asyncio.get_running_loop()
+        self._batch.append(self._dequeued(await self._queue.get()))
+        deadline = loop.time() + self.flush_interval
+        while len(self._batch) < self.batch_size:
+            try:
+                self._batch.append(self._dequeued(self._queue.get_nowait()))
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                self._batch.append(self._dequeued(await asyncio.wait_for(self._queue.get(), remaining)))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            await self._collect()
+            while not await self._flush(self._batch):
+                await asyncio.sleep(self.retry_backoff)
+            self._batch = []
+
+    def start(self):
+        """Begin draining the queue on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._queued = deque()
+            self._slots = asyncio.Semaphore(self.max_queue)
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting events and write everything still queued"""
+        if self._task is None:
+            return
+        self._closing = True
+        # Let a batch that is mid-write finish rather than write it twice
+        while self._writing:
+            await asyncio.sleep(0.01)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        remaining = self._batch
+        while not self._queue.empty():
+            remaining.append(self._dequeued(self._queue.get_nowait()))
+        self._batch = []
+        for start in range(0, len(remaining), self.batch_size):
+            chunk = remaining[start:start + self.batch_size]
+            if not await self._flush(chunk):
+                logger.error(f"Dropped {len(remaining) - start} productivity events at shutdown")
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        queued = len(self._queued)
+        oldest = None
+        if queued:
+            oldest = round((time.monotonic() - self._queued[0].queued_at) * 1000, 3)
+        return {
+            "running": self.running,
+            "queued": queued,
+            "reserved": self.reserved,
+            "max_queue": self.max_queue,
+            "queue_high_water": self.queue_high_water,
+            "oldest_queued_ms": oldest,
+            "events_written": self.events_written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "written_inline": self.written_inline,
+            "backpressure_waits": self.backpressure_waits,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+        }
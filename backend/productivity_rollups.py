@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Productivity Rollups for ThriveRemoteOS
+Hourly and daily points and event counts by action, per user and across all
+users, rolled up incrementally from productivity_logs behind a high-watermark
+"""
+
+import asyncio
+import time
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from async_db import AsyncDatabase
+from db_replicas import read_primary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# user_id of the rows totalled across all users
+ALL_USERS = ""
+
+BUCKET_TABLES = {
+    "hour": "productivity_rollups_hourly",
+    "day": "productivity_rollups_daily",
+}
+BUCKET_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+WATERMARK_NAME = "productivity_logs"
+WATERMARK_START = datetime(1970, 1, 2)
+
+
+def bucket_floor(timestamp: datetime, bucket: str) -> datetime:
+    """Start of the hour or day containing timestamp"""
+    timestamp = timestamp.replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def build_upsert(bucket: str) -> str:
+    """Add events and points to a rollup row, creating it on first use"""
+    return f"""
+        INSERT INTO {BUCKET_TABLES[bucket]} (user_id, bucket_start, action, events, points)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE events = events + VALUES(events), points = points + VALUES(points)
+    """
+
+
+class ProductivityRollup:
+    """Folds productivity_logs rows past the watermark into the rollup tables
+
+    Rows are read in (timestamp, id) order up to grace seconds before now,
+    because the event writer stamps rows before it inserts them; rows that
+    only become visible later than that are not counted. visible_before
+    narrows the window further to events this worker still has queued.
+    Each batch advances the watermark with a compare-and-set in the same
+    transaction as its rollup writes, so when several workers run the job
+    only one of them applies any given batch. All of it reads the primary:
+    a replica could hold a stale watermark or miss rows below the horizon.
+    """
+
+    def __init__(
+        self,
+        database: AsyncDatabase,
+        visible_before: Optional[Callable[[], Optional[datetime]]] = None,
+        grace: float = 120.0,
+        batch_size: int = 5000,
+        batch_pause: float = 0.1,
+        interval: float = 60.0,
+    ):
+        self._db = database
+        self._visible_before = visible_before
+        self.grace = grace
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self.watermark: Optional[datetime] = None
+        # Every row stamped before this has been rolled up
+        self.complete_through: Optional[datetime] = None
+        self.runs = 0
+        self.errors = 0
+        self.conflicts = 0
+        self.total_rows = 0
+        self.last_rows = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+
+    async def _load_watermark(self) -> Tuple[datetime, str]:
+        await self._db.execute(
+            "INSERT IGNORE INTO rollup_watermarks (name, last_timestamp, last_id) VALUES (%s, %s, '')",
+            (WATERMARK_NAME, WATERMARK_START)
+        )
+        row = await self._db.fetch_one(
+            "SELECT last_timestamp, last_id FROM rollup_watermarks WHERE name = %s", (WATERMARK_NAME,)
+        )
+        return row["last_timestamp"], row["last_id"]
+
+    def _horizon(self) -> datetime:
+        horizon = datetime.now() - timedelta(seconds=self.grace)
+        if self._visible_before is not None:
+            oldest = self._visible_before()
+            if oldest is not None and oldest < horizon:
+                horizon = oldest
+        return horizon
+
+    @staticmethod
+    def _aggregate(rows: List[Dict[str, Any]]) -> Dict[str, List[Tuple]]:
+        totals: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        for row in rows:
+            for bucket in BUCKET_TABLES:
+                bucket_start = bucket_floor(row["timestamp"], bucket)
+                for user_id in (row["user_id"], ALL_USERS):
+                    total = totals[(bucket, user_id, bucket_start, row["action"])]
+                    total[0] += 1
+                    total[1] += row["points"] or 0
+
+        writes: Dict[str, List[Tuple]] = defaultdict(list)
+        for (bucket, user_id, bucket_start, action), (events, points) in sorted(totals.items()):
+            writes[bucket].append((user_id, bucket_start, action, events, points))
+        return writes
+
+    async def _roll_up_batch(self, position: Tuple[datetime, str], horizon: datetime) -> Tuple[int, Tuple[datetime, str]]:
+        """Apply the next batch after position; returns rows read and the new position"""
+        last_timestamp, last_id = position
+        query = """
+            SELECT id, user_id, action, timestamp, points
+            FROM productivity_logs
+            WHERE timestamp < %s
+                AND (timestamp > %s OR (timestamp = %s AND id > %s))
+            ORDER BY timestamp, id
+            LIMIT %s
+        """
+        rows = await self._db.fetch_all(query, (horizon, last_timestamp, last_timestamp, last_id, self.batch_size))
+        if not rows:
+            return 0, position
+
+        new_position = (rows[-1]["timestamp"], rows[-1]["id"])
+        async with self._db.transaction() as uow:
+            moved = await uow.execute(
+                """
+                UPDATE rollup_watermarks SET last_timestamp = %s, last_id = %s
+                WHERE name = %s AND last_timestamp = %s AND last_id = %s
+                """,
+                new_position + (WATERMARK_NAME, last_timestamp, last_id)
+            )
+            if not moved:
+                # Another worker rolled this batch up first
+                return -1, position
+            for bucket, values in self._aggregate(rows).items():
+                await uow.execute_many(build_upsert(bucket), values)
+        return len(rows), new_position
+
+    async def roll_up(self) -> int:
+        """Fold every settled log row past the watermark in now; returns rows rolled up"""
+        async with self._running, read_primary():
+            started = time.perf_counter()
+            run_at = datetime.now()
+            rolled_up = 0
+            try:
+                position = await self._load_watermark()
+                horizon = self._horizon()
+                while True:
+                    count, position = await self._roll_up_batch(position, horizon)
+                    if count < 0:
+                        self.conflicts += 1
+                        current = await self._load_watermark()
+                        if current == position:
+                            raise RuntimeError(f"Watermark {position} did not move but could not be advanced")
+                        position = current
+                        continue
+                    rolled_up += count
+                    self.watermark = position[0]
+                    if count < self.batch_size:
+                        self.complete_through = horizon
+                        break
+                    # Let other writers at the tables between batches
+                    await asyncio.sleep(self.batch_pause)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Productivity rollup failed after {rolled_up} rows: {e}")
+            finally:
+                self.runs += 1
+                self.last_rows = rolled_up
+                self.total_rows += rolled_up
+                self.last_run_at = run_at
+                self.last_duration_ms = (time.perf_counter() - started) * 1000
+
+            if rolled_up:
+                logger.info(f"Rolled up {rolled_up} productivity log rows")
+            return rolled_up
+
+    async def series(self, user_id: str, bucket: str, start: datetime, end: datetime,
+                     action: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totals for every bucket from start up to end, read from the rollup tables only"""
+        start = bucket_floor(start, bucket)
+        query = f"""
+            SELECT bucket_start, action, events, points
+            FROM {BUCKET_TABLES[bucket]}
+            WHERE user_id = %s AND bucket_start >= %s AND bucket_start < %s
+        """
+        params = [user_id, start, end]
+        if action is not None:
+            query += " AND action = %s"
+            params.append(action)
+        rows = await self._db.fetch_all(query, tuple(params))
+
+        by_bucket: Dict[datetime, Dict[str, Any]] = {}
+        step = BUCKET_STEPS[bucket]
+        bucket_start = start
+        while bucket_start < end:
+            by_bucket[bucket_start] = {"bucket_start": bucket_start.isoformat(), "events": 0, "points": 0, "actions": {}}
+            bucket_start += step
+        for row in rows:
+            entry = by_bucket.get(row["bucket_start"])
+            if entry is None:
+                continue
+            entry["events"] += row["events"]
+            entry["points"] += row["points"]
+            entry["actions"][row["action"]] = {"events": row["events"], "points": row["points"]}
+        return list(by_bucket.values())
+
+    async def _roll_up_loop(self):
+        while True:
+            await self.roll_up()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic rollups on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._roll_up_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "conflicts": self.conflicts,
+            "total_rows": self.total_rows,
+            "last_rows": self.last_rows,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "complete_through": self.complete_through.isoformat() if self.complete_through else None,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "batch_size": self.batch_size,
+            "grace_seconds": self.grace,
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Query Execution for ThriveRemoteOS
+The synchronous statement runners behind AsyncDatabase: connection checkout,
+prepared-statement reuse, commit or rollback, and per-statement metrics
+"""
+
+import time
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+
+from query_metrics import QueryMetrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class QueryFailed(Exception):
+    """A statement failed in the driver; the connection was rolled back or discarded"""
+
+
+class QueryExecutor:
+    """Runs statements on connections from acquire, or on a unit of work's connection
+
+    acquire(query) checks out a connection that close() returns; it is given
+    the statement for plain reads so it can route them to a replica. errors
+    are the driver exceptions turned into QueryFailed. on_write runs after
+    every successful write, e.g. to keep the writer's reads on the primary.
+    """
+
+    def __init__(
+        self,
+        acquire: Callable[..., Any],
+        errors: Tuple[type, ...],
+        metrics: Optional[QueryMetrics] = None,
+        on_write: Optional[Callable[[], None]] = None,
+        bulk_batch_size: int = 500,
+    ):
+        self._acquire = acquire
+        self._errors = errors
+        self._metrics = metrics
+        self._on_write = on_write
+        self.bulk_batch_size = max(1, bulk_batch_size)
+
+    def _record(self, query: str, params, elapsed_ms: float, rows: int, acquire_ms: float, failed: bool):
+        if self._metrics is not None:
+            self._metrics.record(query, params, elapsed_ms, rows, acquire_ms, error=failed)
+
+    def _wrote(self):
+        if self._on_write is not None:
+            self._on_write()
+
+    def execute(self, query: str, params: tuple = None, fetch: bool = False, fetch_one: bool = False,
+                connection=None):
+        """Execute database query with connection management
+
+        When a connection is passed in (unit of work), the statement joins its
+        transaction: nothing is committed, rolled back or closed here.
+        """
+        owns_connection = connection is None
+        cursor = None
+        statement_cache = None
+        rows = 0
+        failed = False
+        started = time.perf_counter()
+        acquire_ms = 0.0
+        try:
+            if owns_connection:
+                connection = self._acquire(query if (fetch or fetch_one) else None)
+                acquire_ms = (time.perf_counter() - started) * 1000
+
+            # Parameterized statements reuse a server-side prepared statement
+            # cached on the pooled connection, skipping the parse on repeats
+            if params:
+                statement_cache = connection.statement_cache
+            if statement_cache is not None:
+                cursor, query = statement_cache.checkout(query)
+            else:
+                cursor = connection.cursor(dictionary=True, buffered=True)
+
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            if fetch_one:
+                if statement_cache is not None:
+                    # Prepared cursors are unbuffered; drain so the connection stays usable
+                    result = cursor.fetchall()
+                    result = result[0] if result else None
+                else:
+                    result = cursor.fetchone()
+                rows = 1 if result else 0
+                return result
+            elif fetch:
+                result = cursor.fetchall()
+                rows = len(result)
+                return result
+            else:
+                if owns_connection:
+                    connection.commit()
+                self._wrote()
+                rows = cursor.rowcount
+                return rows
+
+        except self._errors as e:
+            failed = True
+            logger.error(f"Database query error: {e}")
+            if statement_cache is not None:
+                statement_cache.discard(query)
+                cursor = None
+            if connection and owns_connection:
+                try:
+                    connection.rollback()
+                except self._errors:
+                    # Broken connection, keep it out of the pool
+                    connection.invalidate()
+            raise QueryFailed(str(e)) from e
+        finally:
+            if cursor and statement_cache is None:
+                try:
+                    cursor.close()
+                except self._errors:
+                    if owns_connection:
+                        connection.invalidate()
+            if connection and owns_connection:
+                connection.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000 - acquire_ms
+            self._record(query, params, elapsed_ms, rows, acquire_ms, failed)
+
+    def execute_many(self, query: str, rows: List[tuple], batch_size: int = None, connection=None) -> int:
+        """Write many rows in batches inside one transaction
+
+        With a unit-of-work connection the batches join its transaction instead.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        batch_size = batch_size or self.bulk_batch_size
+        owns_connection = connection is None
+        cursor = None
+        total = 0
+        failed = False
+        started = time.perf_counter()
+        acquire_ms = 0.0
+        try:
+            if owns_connection:
+                connection = self._acquire(None)
+                acquire_ms = (time.perf_counter() - started) * 1000
+                connection.start_transaction()
+            cursor = connection.cursor()
+
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(query, rows[start:start + batch_size])
+                total += cursor.rowcount
+
+            if owns_connection:
+                connection.commit()
+            self._wrote()
+            return total
+
+        except self._errors as e:
+            failed = True
+            logger.error(f"Database bulk write error: {e}")
+            if connection and owns_connection:
+                try:
+                    connection.rollback()
+                except self._errors:
+                    connection.invalidate()
+            raise QueryFailed(str(e)) from e
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except self._errors:
+                    if owns_connection:
+                        connection.invalidate()
+            if connection and owns_connection:
+                connection.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000 - acquire_ms
+            self._record(query, rows[0], elapsed_ms, total, acquire_ms, failed)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Query Instrumentation for ThriveRemoteOS
+Per-statement latency histograms keyed by normalized SQL, plus a slow-query log
+"""
+
+import re
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("thriveremote.slow_query")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_CASE_ARMS = re.compile(r"WHEN \? THEN \?(?: WHEN \? THEN \?)+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and literals so one statement shape maps to one key"""
+    normalized = _WHITESPACE.sub(" ", query).strip()
+    normalized = normalized.replace("%s", "?")
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    # IN (?, ?, ?) lists and batched CASE arms of any length are the same statement
+    normalized = _CASE_ARMS.sub("WHEN ? THEN ?+", normalized)
+    return _PLACEHOLDER_LIST.sub("(?+)", normalized)
+
+
+def param_shape(params) -> List[str]:
+    """Describe bound parameters by type (and length for strings) without values"""
+    if not params:
+        return []
+    shape = []
+    for value in params:
+        if value is None:
+            shape.append("null")
+        elif isinstance(value, (str, bytes)):
+            shape.append(f"{type(value).__name__}({len(value)})")
+        else:
+            shape.append(type(value).__name__)
+    return shape
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class StatementStats:
+    """Running totals and a bounded latency sample for one statement shape"""
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.acquire_total_ms = 0.0
+        self.samples = deque(maxlen=sample_size)
+
+    def to_dict(self, statement: str) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        return {
+            "statement": statement,
+            "count": self.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(_percentile(samples, 50), 3),
+            "p95_ms": round(_percentile(samples, 95), 3),
+            "p99_ms": round(_percentile(samples, 99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "acquire_avg_ms": round(self.acquire_total_ms / self.count, 3) if self.count else 0.0,
+        }
+
+
+class QueryMetrics:
+    """Thread-safe registry of per-statement timings"""
+
+    SORT_KEYS = ("total_ms", "count", "p95_ms", "p99_ms", "avg_ms", "max_ms", "rows", "errors")
+
+    def __init__(self, slow_query_ms: float = 200.0, sample_size: int = 1024,
+                 max_statements: int = 500, slow_log_size: int = 100):
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self.max_statements = max_statements
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    def record(self, query: str, params, elapsed_ms: float, rows: int = 0,
+               acquire_ms: float = 0.0, error: bool = False):
+        """Record one statement execution"""
+        statement = normalize_sql(query)
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                if len(self._stats) >= self.max_statements:
+                    # Unbounded dynamic SQL must not grow this map forever
+                    statement = "<other>"
+                    stats = self._stats.get(statement)
+                if stats is None:
+                    stats = self._stats[statement] = StatementStats(self.sample_size)
+            stats.count += 1
+            stats.rows += rows or 0
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.acquire_total_ms += acquire_ms
+            stats.samples.append(elapsed_ms)
+            if error:
+                stats.errors += 1
+
+        if self.slow_query_ms and elapsed_ms >= self.slow_query_ms:
+            entry = {
+                "statement": statement,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "acquire_ms": round(acquire_ms, 3),
+                "rows": rows,
+                "params": param_shape(params),
+                "timestamp": datetime.now().isoformat(),
+            }
+            self._slow_queries.append(entry)
+            slow_query_logger.warning(
+                f"Slow query ({elapsed_ms:.1f} ms, acquire {acquire_ms:.1f} ms, "
+                f"{rows} rows, params {entry['params']}): {statement}"
+            )
+
+    def top(self, limit: int = 20, sort_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Top-N statements by the given metric"""
+        if sort_by not in self.SORT_KEYS:
+            sort_by = "total_ms"
+        with self._lock:
+            snapshot = [stats.to_dict(statement) for statement, stats in self._stats.items()]
+        snapshot.sort(key=lambda item: item[sort_by], reverse=True)
+        return snapshot[:limit]
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent slow queries, newest first"""
+        entries = list(self._slow_queries)[::-1]
+        return entries[:limit] if limit else entries
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(stats.count for stats in self._stats.values())
+            total_ms = sum(stats.total_ms for stats in self._stats.values())
+            statements = len(self._stats)
+        return {
+            "statements_tracked": statements,
+            "total_queries": total,
+            "total_ms": round(total_ms, 3),
+            "slow_query_threshold_ms": self.slow_query_ms,
+            "slow_queries_logged": len(self._slow_queries),
+            "since": self.started_at.isoformat(),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+            self.started_at = datetime.now()
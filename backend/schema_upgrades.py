@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Schema Upgrades for ThriveRemoteOS
+Idempotent statements, run at startup, that bring a database created from
+an older database_migration.sql up to date and backfill what they add
+"""
+
+import time
+import logging
+from typing import List, NamedTuple, Tuple
+
+from async_db import AsyncDatabase
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Upgrade(NamedTuple):
+    name: str
+    # CREATE ... IF NOT EXISTS, in MySQL syntax
+    ddl: Tuple[str, ...]
+    # Safe to repeat: only fills in rows that are still missing
+    backfill: Tuple[str, ...] = ()
+
+
+UPGRADES: Tuple[Upgrade, ...] = (
+    Upgrade(
+        "user_counters",
+        ddl=(
+            """
+            CREATE TABLE IF NOT EXISTS user_counters (
+                user_id VARCHAR(36) PRIMARY KEY,
+                applications INT DEFAULT 0,
+                tasks INT DEFAULT 0,
+                tasks_completed INT DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+            """,
+        ),
+        backfill=(
+            """
+            INSERT IGNORE INTO user_counters (user_id, applications, tasks, tasks_completed)
+            SELECT u.id,
+                (SELECT COUNT(*) FROM applications a WHERE a.user_id = u.id),
+                (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.id),
+                (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.id AND t.status = 'completed')
+            FROM users u
+            LEFT JOIN user_counters c ON c.user_id = u.id
+            WHERE c.user_id IS NULL
+            """,
+        ),
+    ),
+    # Filled by the rollup job itself, from its watermark
+    Upgrade(
+        "productivity_rollups",
+        ddl=(
+            """
+            CREATE TABLE IF NOT EXISTS productivity_rollups_hourly (
+                user_id VARCHAR(36) NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                action VARCHAR(255) NOT NULL,
+                events INT DEFAULT 0,
+                points BIGINT DEFAULT 0,
+                PRIMARY KEY (user_id, bucket_start, action)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS productivity_rollups_daily (
+                user_id VARCHAR(36) NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                action VARCHAR(255) NOT NULL,
+                events INT DEFAULT 0,
+                points BIGINT DEFAULT 0,
+                PRIMARY KEY (user_id, bucket_start, action)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_watermarks (
+                name VARCHAR(100) PRIMARY KEY,
+                last_timestamp DATETIME NOT NULL,
+                last_id VARCHAR(36) NOT NULL DEFAULT '',
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+    ),
+)
+
+
+async def apply_upgrades(database: AsyncDatabase, create_tables: bool = True) -> List[str]:
+    """Run every upgrade; returns the names of those whose backfill added rows
+
+    create_tables is off for SQLite, whose backend creates tables added to
+    the schema file itself when it opens an existing database.
+    """
+    backfilled = []
+    for upgrade in UPGRADES:
+        started = time.perf_counter()
+        if create_tables:
+            for statement in upgrade.ddl:
+                await database.execute(statement)
+        rows = 0
+        for statement in upgrade.backfill:
+            rows += await database.execute(statement) or 0
+        if rows:
+            backfilled.append(upgrade.name)
+            logger.info(
+                f"Schema upgrade {upgrade.name} backfilled {rows} rows "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+    return backfilled
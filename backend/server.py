@@ -1,10 +1,11 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Any, Set, Tuple
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import os
 import json
 import io
@@ -12,8 +13,8 @@ import httpx
 import asyncio
 import mysql.connector
 from mysql.connector import Error
+import sqlite3
 import logging
-import hashlib
 import secrets
 import time
 import random
@@ -25,6 +26,25 @@ import sys
 sys.path.append(str(Path(__file__).parent))
 
 from youtube_service import get_youtube_service
+from db_pool import PoolTimeout, create_pool_from_env
+from async_db import AsyncDatabase, UnitOfWork
+from query_metrics import QueryMetrics
+from query_executor import QueryExecutor, QueryFailed
+from db_replicas import ReplicaRouter, begin_request, end_request, read_primary
+from sqlite_backend import SQLiteBackend
+from session_cache import SessionTouchBuffer, NegativeTokenCache, TokenBloomFilter
+from session_store import create_session_store_from_env
+from session_reaper import SessionReaper
+from session_tokens import SignedTokenCodec, RevocationList, parse_signing_keys
+from user_cache import UserCache, DailyTouchSet, begin_request as begin_user_scope, end_request as end_user_scope
+from password_hashing import PasswordHasher, HashingOverloaded
+from hot_rows import HotRowBuffer
+from achievements import AchievementEngine, build_seed_query
+from productivity_events import ProductivityEventWriter
+from leaderboard import Leaderboard
+from productivity_rollups import ALL_USERS, BUCKET_STEPS, ProductivityRollup
+from schema_upgrades import apply_upgrades
+from user_counters import COUNTER_COLUMNS as USER_COUNTER_COLUMNS, CounterReconciler, build_increment
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -67,47 +87,123 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Storage backend: "mysql" (default) or "sqlite" for an embedded single-node database
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql').lower()
+
+# Driver errors the query layer handles, whichever backend is active
+DB_ERRORS = (Error, sqlite3.Error)
+
 # Database connection pool
-def get_db_connection():
-    """Get database connection with error handling"""
+if DB_BACKEND == 'sqlite':
+    sqlite_backend = SQLiteBackend(
+        os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'thriveremote.db')),
+        schema_path=Path(os.environ.get('SQLITE_SCHEMA_PATH', ROOT_DIR.parent / 'database_migration.sql'))
+    )
+    # sqlite3 caches compiled statements per connection itself
+    db_pool = create_pool_from_env(sqlite_backend.connect, statement_cache_size=0)
+else:
+    sqlite_backend = None
+    db_pool = create_pool_from_env(lambda: mysql.connector.connect(**DB_CONFIG))
+
+# Optional read replicas ("host:port,host:port"), same credentials as the primary
+REPLICA_HOSTS = [h.strip() for h in os.environ.get('MYSQL_REPLICA_HOSTS', '').split(',') if h.strip()]
+
+def _replica_pool(spec: str):
+    host, _, port = spec.partition(':')
+    config = {**DB_CONFIG, 'host': host, 'port': int(port or DB_CONFIG['port'])}
+    return create_pool_from_env(lambda: mysql.connector.connect(**config))
+
+replica_router = ReplicaRouter(
+    {spec: _replica_pool(spec) for spec in REPLICA_HOSTS},
+    max_lag_seconds=float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2)),
+    sticky_seconds=float(os.environ.get('REPLICA_STICKY_SECONDS', 5)),
+    check_interval=float(os.environ.get('REPLICA_CHECK_INTERVAL', 5))
+)
+
+# Per-statement latency metrics and slow-query log
+query_metrics = QueryMetrics(
+    slow_query_ms=float(os.environ.get('SLOW_QUERY_MS', 200)),
+    sample_size=int(os.environ.get('QUERY_METRICS_SAMPLES', 1024))
+)
+
+def get_db_connection(query: str = None):
+    """Check out a pooled database connection; close() returns it to the pool
+
+    When the statement is given and is a plain read, a healthy replica is used
+    unless the request (or the user, moments ago) wrote to the primary.
+    """
+    replica = replica_router.replica_for(query) if query else None
+    if replica is not None:
+        try:
+            return replica.pool.acquire()
+        except PoolTimeout as e:
+            logger.warning(f"Replica {replica.name} busy, reading from primary: {e}")
+        except DB_ERRORS as e:
+            replica_router.mark_unhealthy(replica, str(e))
+    
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
+        return db_pool.acquire()
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except DB_ERRORS as e:
         logger.error(f"Database connection error: {e}")
         raise HTTPException(status_code=500, detail="Database connection failed")
 
-def execute_query(query: str, params: tuple = None, fetch: bool = False, fetch_one: bool = False):
-    """Execute database query with connection management"""
-    connection = None
-    cursor = None
+# Rows per executemany() call; mysql.connector rewrites each call into one multi-row INSERT
+BULK_BATCH_SIZE = int(os.environ.get('DB_BULK_BATCH_SIZE', 500))
+
+# Statement runners: pooled or unit-of-work connections, metrics, and
+# replica stickiness after writes
+query_executor = QueryExecutor(
+    get_db_connection,
+    DB_ERRORS,
+    metrics=query_metrics,
+    on_write=replica_router.note_write,
+    bulk_batch_size=BULK_BATCH_SIZE
+)
+execute_query = query_executor.execute
+execute_many = query_executor.execute_many
+
+# Awaitable query API for async handlers, one worker thread per pooled connection
+db = AsyncDatabase(
+    execute_query,
+    get_db_connection,
+    execute_many_fn=execute_many,
+    max_workers=db_pool.max_connections,
+    acquire_timeout=db_pool.timeout
+)
+
+async def get_unit_of_work():
+    """Dependency: run a request's statements on one connection and commit once"""
+    async with db.transaction() as uow:
+        yield uow
+
+@app.middleware("http")
+async def database_routing_scope(request, call_next):
+    """Give each request its own read-replica routing state and user identity map"""
+    token = begin_request()
+    user_scope = begin_user_scope()
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
-        if fetch_one:
-            return cursor.fetchone()
-        elif fetch:
-            return cursor.fetchall()
-        else:
-            connection.commit()
-            return cursor.rowcount
-            
-    except Error as e:
-        logger.error(f"Database query error: {e}")
-        if connection:
-            connection.rollback()
-        raise HTTPException(status_code=500, detail=f"Database operation failed: {str(e)}")
+        return await call_next(request)
     finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
+        end_user_scope(user_scope)
+        end_request(token)
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request, exc: PoolTimeout):
+    logger.error(f"Database pool exhausted: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, please retry"})
+
+@app.exception_handler(QueryFailed)
+async def query_failed_handler(request, exc: QueryFailed):
+    return JSONResponse(status_code=500, content={"detail": f"Database operation failed: {exc}"})
+
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded_handler(request, exc: HashingOverloaded):
+    logger.warning(f"Password hashing overloaded: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Too many sign-in attempts in progress, please retry"},
+                        headers={"Retry-After": "1"})
 
 # Pydantic models
 class User(BaseModel):
@@ -214,37 +310,76 @@ class SiteContent(BaseModel):
     view_count: int = 0
 
 # Authentication utilities
-def hash_password(password: str) -> str:
-    """Hash password with salt"""
-    salt = secrets.token_hex(16)
-    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() + ':' + salt
+# PBKDF2 runs in worker processes; the event loop only awaits the result
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64)),
+    queue_timeout=float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 10))
+)
 
-def verify_password(password: str, password_hash: str) -> bool:
-    """Verify password against hash"""
-    try:
-        stored_hash, salt = password_hash.split(':')
-        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() == stored_hash
-    except:
-        return False
+# Hash given to users created implicitly by get_or_create_user. Computed once,
+# outside any transaction, so creating a user never waits on the hashing pool
+# while holding a database connection
+_default_password_hash: Optional[str] = None
+
+async def default_password_hash() -> str:
+    global _default_password_hash
+    if _default_password_hash is None:
+        _default_password_hash = await password_hasher.hash("default_password")
+    return _default_password_hash
 
 def generate_session_token() -> str:
     """Generate secure session token"""
     return secrets.token_urlsafe(32)
 
-# Session management
-active_sessions = {}
+# Session management: per-process or shared (SESSION_STORE=redis) store in front of user_sessions
+session_store = create_session_store_from_env()
 
-def create_session(user_id: str) -> str:
+# Tokens recently looked up and found missing/expired skip the database
+unknown_tokens = NegativeTokenCache(
+    ttl_seconds=float(os.environ.get('SESSION_NEGATIVE_TTL_SECONDS', 60)),
+    max_size=int(os.environ.get('SESSION_NEGATIVE_CACHE_SIZE', 50000))
+)
+
+# Optional Bloom filter of issued tokens; only valid with a single API worker
+token_filter = TokenBloomFilter(
+    capacity=int(os.environ.get('SESSION_BLOOM_CAPACITY', 100000))
+) if os.environ.get('SESSION_BLOOM_FILTER', 'false').lower() in ('1', 'true', 'yes') else None
+
+# SESSION_TOKEN_FORMAT=signed issues HMAC-signed tokens that validate without a lookup
+SESSION_TOKEN_FORMAT = os.environ.get('SESSION_TOKEN_FORMAT', 'opaque').lower()
+if SESSION_TOKEN_FORMAT == 'signed':
+    signing_keys = parse_signing_keys(os.environ.get('SESSION_SIGNING_KEY', ''))
+    if not signing_keys:
+        raise RuntimeError("SESSION_TOKEN_FORMAT=signed requires SESSION_SIGNING_KEY")
+    signed_tokens = SignedTokenCodec(signing_keys)
+else:
+    signed_tokens = None
+revoked_tokens = RevocationList()
+
+# last_used bumps are buffered and written in batches, not once per request
+session_touches = SessionTouchBuffer(
+    lambda query, params: db.execute(query, params),
+    flush_interval=float(os.environ.get('SESSION_TOUCH_FLUSH_SECONDS', 30)),
+    batch_size=int(os.environ.get('SESSION_TOUCH_BATCH_SIZE', 500))
+)
+
+async def create_session(user_id: str) -> str:
     """Create new session for user"""
-    token = generate_session_token()
     expires_at = datetime.now() + timedelta(hours=24)
-    
-    active_sessions[token] = {
-        "user_id": user_id,
-        "created_at": datetime.now(),
-        "last_used": datetime.now(),
-        "expires_at": expires_at
-    }
+    if signed_tokens is not None:
+        # Self-validating; the user_sessions row is kept for audit and revocation
+        token = signed_tokens.issue(user_id, expires_at)
+    else:
+        token = generate_session_token()
+        await session_store.put(token, {
+            "user_id": user_id,
+            "created_at": datetime.now(),
+            "last_used": datetime.now(),
+            "expires_at": expires_at
+        })
+        if token_filter is not None:
+            token_filter.add(token)
     
     # Store in database
     query = """
@@ -252,51 +387,240 @@ def create_session(user_id: str) -> str:
         VALUES (%s, %s, %s, %s, %s, %s)
     """
     params = (token, user_id, datetime.now(), datetime.now(), True, expires_at)
-    execute_query(query, params)
+    await db.execute(query, params)
     
     return token
 
-def get_user_from_session(token: str) -> Optional[str]:
+async def get_user_from_session(token: str) -> Optional[str]:
     """Get user ID from session token"""
     if not token:
         return None
+    
+    if signed_tokens is not None and signed_tokens.is_signed(token):
+        claims = signed_tokens.verify(token)
+        if claims is None or revoked_tokens.is_revoked(token):
+            return None
+        session_touches.touch(token)
+        return claims[0]
         
-    session = active_sessions.get(token)
-    if session and session["expires_at"] > datetime.now():
-        # Update last used
+    session = await session_store.get(token)
+    if session:
+        # Update last used (flushed to user_sessions in the background)
         session["last_used"] = datetime.now()
-        query = "UPDATE user_sessions SET last_used = %s WHERE token = %s"
-        execute_query(query, (datetime.now(), token))
+        session_touches.touch(token, session["last_used"])
         return session["user_id"]
     
-    # Check database
+    # Known-bad tokens (stale tabs, garbage) never reach the database
+    if unknown_tokens.contains(token):
+        return None
+    if token_filter is not None and not token_filter.might_contain(token):
+        return None
+    
+    # Check database. Replica stickiness is per user, which is not known
+    # yet; a miss on a lagging replica would negative-cache a fresh login
     query = "SELECT user_id, expires_at FROM user_sessions WHERE token = %s AND active = TRUE"
-    result = execute_query(query, (token,), fetch_one=True)
+    async with read_primary():
+        result = await db.fetch_one(query, (token,))
     
     if result and datetime.fromisoformat(str(result['expires_at'])) > datetime.now():
         # Restore to memory
-        active_sessions[token] = {
+        await session_store.put(token, {
             "user_id": result["user_id"],
             "created_at": datetime.now(),
             "last_used": datetime.now(),
             "expires_at": datetime.fromisoformat(str(result['expires_at']))
-        }
+        })
         return result["user_id"]
     
+    unknown_tokens.add(token)
     return None
 
+async def load_token_filter():
+    """Seed the Bloom filter with every live session token"""
+    tokens = []
+    query = "SELECT token FROM user_sessions WHERE active = TRUE AND expires_at > %s"
+    # A replica that lags behind a fresh login would leave its token out
+    async with read_primary():
+        async for rows in db.stream(query, (datetime.now(),)):
+            tokens.extend(row["token"] for row in rows)
+    token_filter.rebuild(tokens)
+    logger.info(f"Session Bloom filter loaded with {len(tokens)} tokens")
+
+async def load_revoked_tokens(since: Optional[datetime]) -> List[Tuple[str, datetime]]:
+    """Logged-out, still-unexpired signed tokens (logged out since `since`, if given)"""
+    query = "SELECT token, expires_at FROM user_sessions WHERE active = FALSE AND expires_at > %s"
+    params = [datetime.now()]
+    if since is not None:
+        # Overlap the previous window so a logout committed mid-sync is not missed
+        query += " AND last_used >= %s"
+        params.append(since - timedelta(seconds=5))
+    revoked = []
+    async with read_primary():
+        async for rows in db.stream(query, tuple(params)):
+            revoked.extend(
+                (row["token"], datetime.fromisoformat(str(row["expires_at"])))
+                for row in rows if signed_tokens.is_signed(row["token"])
+            )
+    return revoked
+
+async def evict_reaped_sessions(tokens: List[str]):
+    """Drop reaped sessions from the session store and pending last_used writes"""
+    for token in tokens:
+        await session_store.discard(token)
+        session_touches.discard(token)
+
+# Expired and logged-out sessions are deleted in the background, batch by batch
+session_reaper = SessionReaper(
+    db,
+    on_reaped=evict_reaped_sessions,
+    reap_inactive=signed_tokens is None,
+    batch_size=int(os.environ.get('SESSION_REAP_BATCH_SIZE', 500)),
+    batch_pause=float(os.environ.get('SESSION_REAP_BATCH_PAUSE_SECONDS', 0.1)),
+    interval=float(os.environ.get('SESSION_REAP_INTERVAL_SECONDS', 3600))
+)
+
+# users rows: loaded at most once per request, briefly shared across requests
+user_cache = UserCache(
+    ttl_seconds=float(os.environ.get('USER_PROFILE_CACHE_TTL_SECONDS', 5)),
+    max_size=int(os.environ.get('USER_PROFILE_CACHE_SIZE', 10000))
+)
+
+async def load_user(user_id: str, uow: Optional[UnitOfWork] = None) -> Optional[Dict]:
+    """users row by id, through the request identity map and profile cache"""
+    user = user_cache.get(user_id)
+    if user is None:
+        runner = uow or db
+        query = "SELECT * FROM users WHERE id = %s"
+        user = await runner.fetch_one(query, (user_id,))
+        if user:
+            user_cache.put(user_id, user, shared=uow is None)
+    return hot_rows.overlay(productivity_events.overlay(user))
+
+# Users whose streak/activity row is already up to date for today
+users_active_today = DailyTouchSet()
+
+def user_changed(user_id: str, uow: Optional[UnitOfWork] = None):
+    """Drop cached copies of a user after writing their row"""
+    user_cache.invalidate(user_id)
+    if uow is not None:
+        # Another request may cache the pre-commit row until the transaction ends
+        uow.after_finish(lambda: user_cache.invalidate(user_id))
+
+# Shared accounts every anonymous request writes to
+HOT_USER_IDS = [user_id.strip() for user_id in os.environ.get('HOT_USER_IDS', 'demo_user').split(',') if user_id.strip()]
+
+def users_changed(user_ids: Iterable[str]):
+    """Drop cached copies of users written to in the background"""
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+# Users ranked by productivity_score, updated from committed scores
+leaderboard = Leaderboard(
+    rebuild_interval=float(os.environ.get('LEADERBOARD_REBUILD_SECONDS', 600)),
+    excluded=HOT_USER_IDS
+)
+
+async def load_leaderboard_scores() -> AsyncIterator[List[Tuple[str, int]]]:
+    """Stream (user_id, productivity_score) for every user with points"""
+    query = "SELECT id, productivity_score FROM users WHERE productivity_score > 0"
+    async for rows in db.stream(query, chunk_size=5000):
+        yield [(row["id"], row["productivity_score"]) for row in rows]
+
+def scores_written(scores: Dict[str, int]):
+    users_changed(scores)
+    leaderboard.apply(scores)
+
+# Productivity logs and score updates, batched by a background writer
+productivity_events = ProductivityEventWriter(
+    db,
+    on_flushed=scores_written,
+    max_queue=int(os.environ.get('PRODUCTIVITY_QUEUE_SIZE', 10000)),
+    batch_size=int(os.environ.get('PRODUCTIVITY_BATCH_SIZE', 500)),
+    flush_interval=float(os.environ.get('PRODUCTIVITY_FLUSH_SECONDS', 0.5)),
+    enqueue_timeout=float(os.environ.get('PRODUCTIVITY_ENQUEUE_TIMEOUT_SECONDS', 0.5))
+)
+
+# Hourly and daily productivity totals, rolled up from productivity_logs
+productivity_rollup = ProductivityRollup(
+    db,
+    visible_before=productivity_events.oldest_unwritten,
+    grace=float(os.environ.get('PRODUCTIVITY_ROLLUP_GRACE_SECONDS', 120)),
+    batch_size=int(os.environ.get('PRODUCTIVITY_ROLLUP_BATCH_SIZE', 5000)),
+    batch_pause=float(os.environ.get('PRODUCTIVITY_ROLLUP_BATCH_PAUSE_SECONDS', 0.1)),
+    interval=float(os.environ.get('PRODUCTIVITY_ROLLUP_INTERVAL_SECONDS', 60))
+)
+
+# Rows every anonymous request writes to (demo_user) take counter and savings
+# writes in memory and flush them periodically instead of locking the row
+hot_rows = HotRowBuffer(
+    db.execute,
+    HOT_USER_IDS,
+    flush_interval=float(os.environ.get('HOT_ROW_FLUSH_SECONDS', 1.0)),
+    on_flushed=user_cache.invalidate
+)
+hot_counters = HotRowBuffer(
+    db.execute,
+    HOT_USER_IDS,
+    flush_interval=float(os.environ.get('HOT_ROW_FLUSH_SECONDS', 1.0)),
+    table="user_counters",
+    key_column="user_id",
+    counter_columns=USER_COUNTER_COLUMNS,
+    assignable_columns=(),
+    build_write=lambda user_id, pending: build_increment(user_id, pending.increments)
+)
+
+def buffer_hot_write(uow: Optional[UnitOfWork], write):
+    """Apply a buffered hot-row write now, or once the transaction commits"""
+    if uow is None:
+        write()
+    else:
+        uow.after_finish(lambda: write() if uow.committed else None)
+
+async def bump_counters(user_id: str, uow: Optional[UnitOfWork] = None, **deltas: int) -> Dict[str, int]:
+    """Add to a user's dashboard counters in the same transaction as the write they count
+
+    Returns the counters with the deltas applied.
+    """
+    if hot_counters.is_hot(user_id):
+        counters = await load_counters(user_id, uow)
+        for column, delta in deltas.items():
+            buffer_hot_write(uow, lambda column=column, delta=delta: hot_counters.increment(user_id, column, delta))
+            counters[column] += delta
+        return counters
+    runner = uow or db
+    await runner.execute(*build_increment(user_id, deltas))
+    return await load_counters(user_id, uow)
+
+async def load_counters(user_id: str, uow: Optional[UnitOfWork] = None) -> Dict[str, int]:
+    """Dashboard counters by primary key; users not counted yet read as zero"""
+    runner = uow or db
+    query = "SELECT user_id, applications, tasks, tasks_completed FROM user_counters WHERE user_id = %s"
+    counters = await runner.fetch_one(query, (user_id,)) or {"user_id": user_id}
+    counters = hot_counters.overlay(counters)
+    return {column: counters.get(column) or 0 for column in USER_COUNTER_COLUMNS}
+
+# Recounts users periodically and repairs counters that drifted
+counter_reconciler = CounterReconciler(
+    db,
+    stored_view=lambda row: hot_rows.overlay(hot_counters.overlay(row)),
+    on_repaired=users_changed,
+    batch_size=int(os.environ.get('USER_COUNTER_RECONCILE_BATCH_SIZE', 500)),
+    batch_pause=float(os.environ.get('USER_COUNTER_RECONCILE_BATCH_PAUSE_SECONDS', 0.1)),
+    interval=float(os.environ.get('USER_COUNTER_RECONCILE_INTERVAL_SECONDS', 3600))
+)
+
 # Enhanced content management functions
-async def get_or_create_user(user_id: str) -> Dict:
+async def get_or_create_user(user_id: str, uow: Optional[UnitOfWork] = None) -> Dict:
     """Get or create user with enhanced MySQL integration"""
-    query = "SELECT * FROM users WHERE id = %s"
-    user = execute_query(query, (user_id,), fetch_one=True)
+    runner = uow or db
+    user = await load_user(user_id, uow)
     
     if not user:
         user_data = {
             "id": user_id,
             "username": f"User_{user_id[-6:]}",
             "email": None,
-            "password_hash": hash_password("default_password"),
+            "password_hash": await default_password_hash(),
             "created_date": datetime.now(),
             "last_active": datetime.now(),
             "total_sessions": 1,
@@ -329,164 +653,73 @@ async def get_or_create_user(user_id: str) -> Dict:
             user_data["pong_high_score"], user_data["commands_executed"], 
             user_data["easter_eggs_found"]
         )
-        execute_query(query, params)
+        await runner.execute(query, params)
         
         # Initialize default achievements
-        await initialize_achievements(user_id)
+        await initialize_achievements(user_id, uow)
         
         user = user_data
     else:
         # Update last active and check streak
-        await update_user_activity(user_id)
+        await update_user_activity(user_id, uow)
     
     return user
 
-async def update_user_activity(user_id: str):
-    """Update user activity and daily streak"""
+async def update_user_activity(user_id: str, uow: Optional[UnitOfWork] = None):
+    """Update user activity and daily streak, at most once per user per day"""
+    runner = uow or db
     now = datetime.now()
     today = now.date()
     
-    query = "SELECT daily_streak, last_streak_date FROM users WHERE id = %s"
-    user = execute_query(query, (user_id,), fetch_one=True)
+    if users_active_today.seen(user_id, today):
+        return
     
-    if user:
-        last_streak_date = user.get("last_streak_date")
-        daily_streak = user.get("daily_streak", 0)
-        
-        if last_streak_date != today:
-            yesterday = today - timedelta(days=1)
-            if last_streak_date == yesterday:
-                # Continue streak
-                daily_streak += 1
-            else:
-                # Reset streak
-                daily_streak = 1
-            
-            query = """
-                UPDATE users 
-                SET last_active = %s, daily_streak = %s, last_streak_date = %s, total_sessions = total_sessions + 1
-                WHERE id = %s
-            """
-            execute_query(query, (now, daily_streak, today, user_id))
-
-async def log_productivity_action(user_id: str, action: str, points: int, metadata: Dict = {}):
-    """Log user productivity action and award points"""
-    log_id = str(uuid.uuid4())
+    # The row before the update, to know what the streak becomes
+    user = await load_user(user_id, uow)
     
-    # Insert productivity log
+    # Continue the streak from yesterday, otherwise restart it; no-op if already
+    # counted today. MySQL applies SET left to right, so the CASE must read
+    # last_streak_date before it is overwritten. Dates come from the app clock.
     query = """
-        INSERT INTO productivity_logs (id, user_id, action, timestamp, points, metadata)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        UPDATE users 
+        SET daily_streak = CASE WHEN last_streak_date = %s THEN daily_streak + 1 ELSE 1 END,
+            last_active = %s, last_streak_date = %s, total_sessions = total_sessions + 1
+        WHERE id = %s AND (last_streak_date IS NULL OR last_streak_date <> %s)
     """
-    params = (log_id, user_id, action, datetime.now(), points, json.dumps(metadata))
-    execute_query(query, params)
-    
-    # Update user productivity score
-    query = "UPDATE users SET productivity_score = productivity_score + %s WHERE id = %s"
-    execute_query(query, (points, user_id))
+    yesterday = today - timedelta(days=1)
+    updated = await runner.execute(query, (yesterday, now, today, user_id, today))
+    if updated:
+        user_changed(user_id, uow)
+        last_streak_date = user.get("last_streak_date") if user else None
+        streak = (user.get("daily_streak") or 0) + 1 if str(last_streak_date) == str(yesterday) else 1
+        await achievement_engine.handle(user_id, "daily_streak", {"streak": streak}, uow)
+    
+    if uow is None:
+        users_active_today.add(user_id, today)
+    else:
+        def mark_if_committed():
+            if uow.committed:
+                users_active_today.add(user_id, today)
+        uow.after_finish(mark_if_committed)
+
+async def log_productivity_action(user_id: str, action: str, points: int, metadata: Dict,
+                                  uow: Optional[UnitOfWork]) -> Optional[float]:
+    """Log user productivity action, award points and evaluate achievement rules
+
+    The log row and score update are written in the background once uow
+    commits. uow is the caller's transaction, or None if it holds none; it
+    is required so that a caller holding a connection never has the event
+    written on a second one. Returns the progress counter the action
+    advanced, if any rule watches it.
+    """
+    await productivity_events.submit(user_id, action, points, metadata, uow)
+    return await achievement_engine.handle(user_id, action, metadata, uow)
 
-async def initialize_achievements(user_id: str):
-    """Initialize achievement system for user"""
-    default_achievements = [
-        {
-            "id": "first_job_apply",
-            "user_id": user_id,
-            "achievement_type": "job_application",
-            "title": "First Step",
-            "description": "Applied to your first job",
-            "icon": "🎯",
-            "unlocked": False
-        },
-        {
-            "id": "savings_milestone_25",
-            "user_id": user_id,
-            "achievement_type": "savings",
-            "title": "Quarter Way There",
-            "description": "Reached 25% of savings goal",
-            "icon": "💰",
-            "unlocked": False
-        },
-        {
-            "id": "savings_milestone_50",
-            "user_id": user_id,
-            "achievement_type": "savings",
-            "title": "Halfway Hero",
-            "description": "Reached 50% of savings goal",
-            "icon": "💎",
-            "unlocked": False
-        },
-        {
-            "id": "task_master",
-            "user_id": user_id,
-            "achievement_type": "tasks",
-            "title": "Task Master",
-            "description": "Completed 10 tasks",
-            "icon": "✅",
-            "unlocked": False
-        },
-        {
-            "id": "terminal_ninja",
-            "user_id": user_id,
-            "achievement_type": "terminal",
-            "title": "Terminal Ninja",
-            "description": "Executed 50 terminal commands",
-            "icon": "⚡",
-            "unlocked": False
-        },
-        {
-            "id": "pong_champion",
-            "user_id": user_id,
-            "achievement_type": "gaming",
-            "title": "Pong Champion",
-            "description": "Score 200 points in Pong",
-            "icon": "🏆",
-            "unlocked": False
-        },
-        {
-            "id": "easter_hunter",
-            "user_id": user_id,
-            "achievement_type": "easter_eggs",
-            "title": "Easter Egg Hunter",
-            "description": "Found 5 easter eggs",
-            "icon": "🥚",
-            "unlocked": False
-        },
-        {
-            "id": "streak_week",
-            "user_id": user_id,
-            "achievement_type": "streak",
-            "title": "Weekly Warrior",
-            "description": "Maintained 7-day streak",
-            "icon": "🔥",
-            "unlocked": False
-        },
-        {
-            "id": "relocation_explorer",
-            "user_id": user_id,
-            "achievement_type": "relocation",
-            "title": "Relocation Explorer",
-            "description": "Explored relocation data and properties",
-            "icon": "🏡",
-            "unlocked": False
-        }
-    ]
-    
-    for achievement in default_achievements:
-        # Only insert if doesn't exist
-        check_query = "SELECT id FROM achievements WHERE id = %s AND user_id = %s"
-        existing = execute_query(check_query, (achievement["id"], user_id), fetch_one=True)
-        
-        if not existing:
-            query = """
-                INSERT INTO achievements (id, user_id, achievement_type, title, description, icon, unlocked)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            params = (
-                achievement["id"], achievement["user_id"], achievement["achievement_type"],
-                achievement["title"], achievement["description"], achievement["icon"],
-                achievement["unlocked"]
-            )
-            execute_query(query, params)
+async def initialize_achievements(user_id: str, uow: Optional[UnitOfWork] = None):
+    """Give a user every catalog achievement they do not have yet"""
+    runner = uow or db
+    query, params = build_seed_query([user_id])
+    await runner.execute(query, params)
 
 # Relocate Me integration service
 class RelocateMeService:
@@ -654,21 +887,25 @@ class JobFetchingService:
         jobs = await self.fetch_remotive_jobs()
         
         if jobs:
-            # Clear old jobs and insert new ones
-            execute_query("DELETE FROM jobs WHERE source = 'Remotive'")
-            
-            for job in jobs:
+            # Clear old jobs and insert new ones in one transaction, so readers
+            # never see an empty job board mid-refresh
+            async with db.transaction() as uow:
+                await uow.execute("DELETE FROM jobs WHERE source = 'Remotive'")
+                
                 query = """
                     INSERT INTO jobs (id, title, company, location, salary, type, description, 
                                     skills, posted_date, application_status, source, url)
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
-                params = (
-                    job["id"], job["title"], job["company"], job["location"],
-                    job["salary"], job["type"], job["description"], job["skills"],
-                    job["posted_date"], job["application_status"], job["source"], job["url"]
-                )
-                execute_query(query, params)
+                rows = [
+                    (
+                        job["id"], job["title"], job["company"], job["location"],
+                        job["salary"], job["type"], job["description"], job["skills"],
+                        job["posted_date"], job["application_status"], job["source"], job["url"]
+                    )
+                    for job in jobs
+                ]
+                await uow.execute_many(query, rows)
             
             logger.info(f"Refreshed {len(jobs)} jobs from Remotive")
         
@@ -680,15 +917,17 @@ class JobFetchingService:
 job_service = JobFetchingService()
 
 # Helper function to get user from session (now optional)
-def get_current_user(session_token: str = None):
+async def get_current_user(session_token: str = None):
     """Dependency to get current user from session (optional for demo)"""
     if not session_token:
         return "demo_user"  # Default demo user
     
-    user_id = get_user_from_session(session_token)
+    user_id = await get_user_from_session(session_token)
     if not user_id:
         return "demo_user"  # Fallback to demo user
     
+    # Session users read their own writes from the primary for a few seconds
+    replica_router.bind_user(user_id)
     return user_id
 
 # API Routes
@@ -789,47 +1028,63 @@ async def validate_youtube_url(url: str):
 
 # Original API endpoints
 
+# Rows fetched per round-trip when streaming large result sets
+STREAM_CHUNK_SIZE = int(os.environ.get('DB_STREAM_CHUNK_SIZE', 500))
+
+def _json_default(value):
+    """JSON encoding for database values, matching FastAPI's encoder"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+async def stream_json_sections(header: Dict[str, Any], sections: List[Tuple[str, str]], total_key: str):
+    """Stream a JSON object whose "data" member holds one array per query
+
+    Rows are encoded chunk by chunk as they arrive from the database, so peak
+    memory is one chunk rather than every table in full.
+    """
+    total = 0
+    try:
+        yield json.dumps(header, default=_json_default)[:-1] + ', "data": {'
+        for index, (name, query) in enumerate(sections):
+            yield ('' if index == 0 else ', ') + json.dumps(name) + ': ['
+            first = True
+            async for rows in db.stream(query, chunk_size=STREAM_CHUNK_SIZE):
+                encoded = ', '.join(json.dumps(row, default=_json_default) for row in rows)
+                yield ('' if first else ', ') + encoded
+                first = False
+                total += len(rows)
+            yield ']'
+        yield '}, ' + json.dumps(total_key) + ': ' + str(total) + '}'
+    except Exception as e:
+        # Headers are already sent; a truncated body is how the client sees the failure
+        logger.error(f"Error streaming {', '.join(name for name, _ in sections)}: {e}")
+        raise
+
 # Content Management API Endpoints
 @app.get("/api/content/all")
 async def get_all_content():
-    """Get all content for easy retrieval and backup"""
-    content_data = {}
-    
-    try:
-        # Get job resources
-        query = "SELECT * FROM job_resources ORDER BY created_at DESC"
-        content_data["job_resources"] = execute_query(query, fetch=True)
-        
-        # Get AI tools
-        query = "SELECT * FROM ai_tools ORDER BY created_at DESC"
-        content_data["ai_tools"] = execute_query(query, fetch=True)
-        
-        # Get Peak District content
-        query = "SELECT * FROM peak_district_content ORDER BY created_at DESC"
-        content_data["peak_district"] = execute_query(query, fetch=True)
-        
-        # Get waitress toolkit
-        query = "SELECT * FROM waitress_toolkit ORDER BY created_at DESC"
-        content_data["waitress_toolkit"] = execute_query(query, fetch=True)
-        
-        # Get journey planning
-        query = "SELECT * FROM journey_planning ORDER BY created_at DESC"
-        content_data["journey_planning"] = execute_query(query, fetch=True)
-        
-        # Get site content
-        query = "SELECT * FROM site_content WHERE status = 'published' ORDER BY created_at DESC"
-        content_data["site_content"] = execute_query(query, fetch=True)
-        
-        return {
-            "success": True,
-            "data": content_data,
-            "total_items": sum(len(items) for items in content_data.values()),
-            "retrieved_at": datetime.now().isoformat()
-        }
-        
-    except Exception as e:
-        logger.error(f"Error retrieving all content: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve content")
+    """Get all content for easy retrieval and backup (streamed)"""
+    sections = [
+        ("job_resources", "SELECT * FROM job_resources ORDER BY created_at DESC"),
+        ("ai_tools", "SELECT * FROM ai_tools ORDER BY created_at DESC"),
+        ("peak_district", "SELECT * FROM peak_district_content ORDER BY created_at DESC"),
+        ("waitress_toolkit", "SELECT * FROM waitress_toolkit ORDER BY created_at DESC"),
+        ("journey_planning", "SELECT * FROM journey_planning ORDER BY created_at DESC"),
+        ("site_content", "SELECT * FROM site_content WHERE status = 'published' ORDER BY created_at DESC"),
+    ]
+    header = {
+        "success": True,
+        "retrieved_at": datetime.now().isoformat()
+    }
+    return StreamingResponse(
+        stream_json_sections(header, sections, "total_items"),
+        media_type="application/json"
+    )
 
 @app.get("/api/content/jobs")
 async def get_job_content():
@@ -913,35 +1168,25 @@ async def get_journey_planning_content():
 
 @app.get("/api/admin/backup")
 async def backup_database():
-    """Create complete database backup"""
-    try:
-        backup_data = {}
-        
-        # Define all tables to backup
-        tables = [
-            'users', 'jobs', 'applications', 'tasks', 'achievements', 
-            'user_sessions', 'productivity_logs', 'relocate_data',
-            'site_content', 'job_resources', 'ai_tools', 
-            'peak_district_content', 'waitress_toolkit', 
-            'journey_planning', 'app_settings'
-        ]
-        
-        for table in tables:
-            query = f"SELECT * FROM {table}"
-            backup_data[table] = execute_query(query, fetch=True)
-        
-        backup_info = {
-            "backup_date": datetime.now().isoformat(),
-            "total_tables": len(tables),
-            "total_records": sum(len(records) for records in backup_data.values()),
-            "data": backup_data
-        }
-        
-        return backup_info
-        
-    except Exception as e:
-        logger.error(f"Error creating backup: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create backup")
+    """Create complete database backup (streamed table by table)"""
+    # Define all tables to backup
+    tables = [
+        'users', 'jobs', 'applications', 'tasks', 'achievements', 
+        'user_sessions', 'productivity_logs', 'relocate_data',
+        'site_content', 'job_resources', 'ai_tools', 
+        'peak_district_content', 'waitress_toolkit', 
+        'journey_planning', 'app_settings'
+    ]
+    
+    header = {
+        "backup_date": datetime.now().isoformat(),
+        "total_tables": len(tables)
+    }
+    sections = [(table, f"SELECT * FROM {table}") for table in tables]
+    return StreamingResponse(
+        stream_json_sections(header, sections, "total_records"),
+        media_type="application/json"
+    )
 
 # Authentication endpoints
 @app.post("/api/auth/register")
@@ -956,7 +1201,7 @@ async def register_user(request: RegisterRequest):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    password_hash = hash_password(request.password)
+    password_hash = await password_hasher.hash(request.password)
     
     query = """
         INSERT INTO users (id, username, email, password_hash, created_date, last_active, 
@@ -975,7 +1220,7 @@ async def register_user(request: RegisterRequest):
     await initialize_achievements(user_id)
     
     # Create session
-    session_token = create_session(user_id)
+    session_token = await create_session(user_id)
     
     return {
         "message": "User registered successfully!",
@@ -995,14 +1240,14 @@ async def login_user(request: LoginRequest):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Verify password
-    if not verify_password(request.password, user["password_hash"]):
+    if not await password_hasher.verify(request.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Update last active
     await update_user_activity(user["id"])
     
     # Create session
-    session_token = create_session(user["id"])
+    session_token = await create_session(user["id"])
     
     return {
         "message": "Login successful!",
@@ -1014,19 +1259,24 @@ async def login_user(request: LoginRequest):
 @app.post("/api/auth/logout")
 async def logout_user(session_token: str):
     """Logout user"""
-    if session_token in active_sessions:
-        del active_sessions[session_token]
-    
-    # Deactivate in database
-    query = "UPDATE user_sessions SET active = FALSE WHERE token = %s"
-    execute_query(query, (session_token,))
+    await session_store.discard(session_token)
+    session_touches.discard(session_token)
+    unknown_tokens.add(session_token)
+    if signed_tokens is not None and signed_tokens.is_signed(session_token):
+        claims = signed_tokens.verify(session_token)
+        if claims is not None:
+            revoked_tokens.revoke(session_token, claims[1])
+    
+    # Deactivate in database; last_used marks when, for other workers' revocation sync
+    query = "UPDATE user_sessions SET active = FALSE, last_used = %s WHERE token = %s"
+    execute_query(query, (datetime.now(), session_token))
     
     return {"message": "Logged out successfully"}
 
 @app.get("/api/user/current")
 async def get_current_user_info(session_token: str = None):
     """Get current user information (demo mode)"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     user = await get_or_create_user(user_id)
     
     # Remove sensitive data
@@ -1039,7 +1289,7 @@ async def get_live_jobs():
     
     # Ensure fresh data from multiple sources
     query = "SELECT COUNT(*) as count FROM jobs"
-    result = execute_query(query, fetch_one=True)
+    result = await db.fetch_one(query)
     jobs_count = result['count'] if result else 0
     
     if jobs_count < 10:  # Refresh if we have fewer than 10 jobs
@@ -1047,7 +1297,7 @@ async def get_live_jobs():
     
     # Get jobs from database
     query = "SELECT * FROM jobs ORDER BY posted_date DESC LIMIT 50"
-    jobs = execute_query(query, fetch=True)
+    jobs = await db.fetch_all(query)
     
     # Parse skills JSON for each job
     for job in jobs:
@@ -1145,30 +1395,32 @@ async def get_live_dashboard_stats():
 @app.post("/api/jobs/refresh")
 async def refresh_jobs(session_token: str = None):
     """Manually refresh job listings"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     count = await job_service.refresh_jobs()
     
-    await log_productivity_action(user_id, "refresh_jobs", 5, {"jobs_count": count})
+    # No transaction here: the refresh is an HTTP fetch that must not hold a connection
+    await log_productivity_action(user_id, "refresh_jobs", 5, {"jobs_count": count}, None)
     
     return {"message": f"Refreshed {count} live job listings", "count": count}
 
 @app.post("/api/jobs/{job_id}/apply")
-async def apply_to_job(job_id: str, session_token: str = None):
+async def apply_to_job(job_id: str, session_token: str = None,
+                       uow: UnitOfWork = Depends(get_unit_of_work)):
     """Apply to a real job"""
-    user_id = get_current_user(session_token)
-    user = await get_or_create_user(user_id)
+    user_id = await get_current_user(session_token)
+    user = await get_or_create_user(user_id, uow)
     
     # Get job from database
     query = "SELECT * FROM jobs WHERE id = %s"
-    job = execute_query(query, (job_id,), fetch_one=True)
+    job = await uow.fetch_one(query, (job_id,))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Update job status
     query = "UPDATE jobs SET application_status = %s WHERE id = %s"
-    execute_query(query, ("applied", job_id))
+    await uow.execute(query, ("applied", job_id))
     
     # Create application record
     application_id = str(uuid.uuid4())
@@ -1180,21 +1432,15 @@ async def apply_to_job(job_id: str, session_token: str = None):
         application_id, user_id, job_id, job["title"], job["company"],
         "applied", datetime.now(), f"Applied via ThriveRemote OS to {job['company']}"
     )
-    execute_query(query, params)
+    await uow.execute(query, params)
+    counters = await bump_counters(user_id, uow, applications=1)
     
-    # Award points and check achievements
+    # Award points; the achievement rules unlock first_job_apply
     await log_productivity_action(user_id, "job_application", 15, {
         "job_title": job["title"],
-        "company": job["company"]
-    })
-    
-    # Check for first application achievement
-    query = "SELECT COUNT(*) as count FROM applications WHERE user_id = %s"
-    result = execute_query(query, (user_id,), fetch_one=True)
-    total_applications = result['count'] if result else 0
-    
-    if total_applications == 1:
-        await unlock_achievement(user_id, "first_job_apply")
+        "company": job["company"],
+        "applications": counters["applications"]
+    }, uow)
     
     return {
         "message": "Application submitted successfully! Great progress! 🎯",
@@ -1205,7 +1451,7 @@ async def apply_to_job(job_id: str, session_token: str = None):
 @app.get("/api/applications")
 async def get_applications(session_token: str = None):
     """Get user's job applications"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     
     query = "SELECT * FROM applications WHERE user_id = %s ORDER BY applied_date DESC"
@@ -1216,7 +1462,7 @@ async def get_applications(session_token: str = None):
 @app.get("/api/savings")
 async def get_savings(session_token: str = None):
     """Get user's real savings data"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     user = await get_or_create_user(user_id)
     
     current_amount = user.get("current_savings", 0.0)
@@ -1246,26 +1492,24 @@ async def get_savings(session_token: str = None):
     return savings_data
 
 @app.post("/api/savings/update")
-async def update_savings(amount: float, session_token: str = None):
+async def update_savings(amount: float, session_token: str = None,
+                         uow: UnitOfWork = Depends(get_unit_of_work)):
     """Update user's savings amount"""
-    user_id = get_current_user(session_token)
-    user = await get_or_create_user(user_id)
+    user_id = await get_current_user(session_token)
+    user = await get_or_create_user(user_id, uow)
     
     # Update savings
-    query = "UPDATE users SET current_savings = %s WHERE id = %s"
-    execute_query(query, (amount, user_id))
-    
-    # Award points
-    await log_productivity_action(user_id, "savings_update", 10, {"amount": amount})
+    if hot_rows.is_hot(user_id):
+        buffer_hot_write(uow, lambda: hot_rows.assign(user_id, "current_savings", amount))
+    else:
+        query = "UPDATE users SET current_savings = %s WHERE id = %s"
+        await uow.execute(query, (amount, user_id))
+        user_changed(user_id, uow)
     
-    # Check achievement milestones
-    target = user.get("savings_goal", 5000.0)
+    # Award points; the achievement rules unlock the savings milestones
+    target = float(user.get("savings_goal") or 5000.0)
     progress = (amount / target) * 100
-    
-    if progress >= 25:
-        await unlock_achievement(user_id, "savings_milestone_25")
-    if progress >= 50:
-        await unlock_achievement(user_id, "savings_milestone_50")
+    await log_productivity_action(user_id, "savings_update", 10, {"amount": amount, "progress": progress}, uow)
     
     return {
         "message": "Savings updated successfully! 💰",
@@ -1276,8 +1520,7 @@ async def update_savings(amount: float, session_token: str = None):
 
 async def get_monthly_savings_progress(user_id: str) -> List[Dict]:
     """Get monthly savings progress"""
-    query = "SELECT current_savings, daily_streak FROM users WHERE id = %s"
-    user = execute_query(query, (user_id,), fetch_one=True)
+    user = await load_user(user_id)
     
     if not user:
         return []
@@ -1301,21 +1544,22 @@ async def get_monthly_savings_progress(user_id: str) -> List[Dict]:
 @app.get("/api/tasks")
 async def get_tasks(session_token: str = None):
     """Get user's tasks"""
-    user_id = get_current_user(session_token) 
+    user_id = await get_current_user(session_token) 
     await get_or_create_user(user_id)
     
     query = "SELECT * FROM tasks WHERE user_id = %s ORDER BY created_date DESC"
-    tasks = execute_query(query, (user_id,), fetch=True)
+    tasks = await db.fetch_all(query, (user_id,))
     
     # If no tasks, create some defaults
     if not tasks:
         await create_default_tasks(user_id)
-        tasks = execute_query(query, (user_id,), fetch=True)
+        tasks = await db.fetch_all(query, (user_id,))
     
     return {"tasks": tasks}
 
-async def create_default_tasks(user_id: str):
+async def create_default_tasks(user_id: str, uow: Optional[UnitOfWork] = None):
     """Create default tasks for new user"""
+    runner = uow or db
     default_tasks = [
         {
             "id": str(uuid.uuid4()),
@@ -1350,23 +1594,31 @@ async def create_default_tasks(user_id: str):
         }
     ]
     
-    for task in default_tasks:
-        query = """
-            INSERT INTO tasks (id, user_id, title, description, status, priority, category, due_date, created_date)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        params = (
+    query = """
+        INSERT INTO tasks (id, user_id, title, description, status, priority, category, due_date, created_date)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    rows = [
+        (
             task["id"], task["user_id"], task["title"], task["description"],
             task["status"], task["priority"], task["category"], 
             task.get("due_date"), task["created_date"]
         )
-        execute_query(query, params)
+        for task in default_tasks
+    ]
+    await runner.execute_many(query, rows)
+    await bump_counters(
+        user_id, uow,
+        tasks=len(default_tasks),
+        tasks_completed=sum(1 for task in default_tasks if task["status"] == "completed")
+    )
 
 @app.post("/api/tasks")
-async def create_task(task_data: dict, session_token: str = None):
+async def create_task(task_data: dict, session_token: str = None,
+                      uow: UnitOfWork = Depends(get_unit_of_work)):
     """Create a new task"""
-    user_id = get_current_user(session_token)
-    await get_or_create_user(user_id)
+    user_id = await get_current_user(session_token)
+    await get_or_create_user(user_id, uow)
     
     task_id = str(uuid.uuid4())
     query = """
@@ -1379,50 +1631,142 @@ async def create_task(task_data: dict, session_token: str = None):
         task_data.get("priority", "medium"), task_data.get("category", "general"),
         task_data.get("due_date"), datetime.now()
     )
-    execute_query(query, params)
+    await uow.execute(query, params)
+    await bump_counters(user_id, uow, tasks=1)
     
-    await log_productivity_action(user_id, "task_created", 5, {"task_title": task_data.get("title", "New Task")})
+    await log_productivity_action(user_id, "task_created", 5, {"task_title": task_data.get("title", "New Task")}, uow)
     
     return {"message": "Task created! 📋", "task_id": task_id, "points_earned": 5}
 
 @app.put("/api/tasks/{task_id}/complete")
-async def complete_task(task_id: str, session_token: str = None):
+async def complete_task(task_id: str, session_token: str = None,
+                        uow: UnitOfWork = Depends(get_unit_of_work)):
     """Mark task as completed"""
-    user_id = get_current_user(session_token)
-    await get_or_create_user(user_id)
+    user_id = await get_current_user(session_token)
+    await get_or_create_user(user_id, uow)
     
     # Check if task exists and belongs to user
-    query = "SELECT title FROM tasks WHERE id = %s AND user_id = %s"
-    task = execute_query(query, (task_id, user_id), fetch_one=True)
+    query = "SELECT title, status FROM tasks WHERE id = %s AND user_id = %s"
+    task = await uow.fetch_one(query, (task_id, user_id))
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    if task["status"] == "completed":
+        # Completing it again earns nothing and counts nothing
+        counters = await load_counters(user_id, uow)
+        return {
+            "message": "Task already completed ✅",
+            "points_earned": 0,
+            "total_completed": counters["tasks_completed"]
+        }
+    
     # Update task
     query = "UPDATE tasks SET status = %s, completed_date = %s WHERE id = %s AND user_id = %s"
-    execute_query(query, ("completed", datetime.now(), task_id, user_id))
-    
-    # Award points
-    await log_productivity_action(user_id, "task_completed", 20, {"task_title": task["title"]})
-    
-    # Check achievements
-    query = "SELECT COUNT(*) as count FROM tasks WHERE user_id = %s AND status = 'completed'"
-    result = execute_query(query, (user_id,), fetch_one=True)
-    completed_count = result['count'] if result else 0
+    await uow.execute(query, ("completed", datetime.now(), task_id, user_id))
+    counters = await bump_counters(user_id, uow, tasks_completed=1)
     
-    if completed_count >= 10:
-        await unlock_achievement(user_id, "task_master")
+    # Award points; the achievement rules unlock task_master
+    await log_productivity_action(user_id, "task_completed", 20, {
+        "task_title": task["title"],
+        "tasks_completed": counters["tasks_completed"]
+    }, uow)
     
     return {
         "message": "Task completed! Great work! ✅",
         "points_earned": 20,
-        "total_completed": completed_count
+        "total_completed": counters["tasks_completed"]
+    }
+
+async def with_usernames(entries: List[Dict]) -> List[Dict]:
+    """Leaderboard entries with usernames instead of user ids"""
+    if not entries:
+        return []
+    placeholders = ", ".join(["%s"] * len(entries))
+    query = f"SELECT id, username FROM users WHERE id IN ({placeholders})"
+    rows = await db.fetch_all(query, tuple(entry["user_id"] for entry in entries))
+    usernames = {row["id"]: row["username"] for row in rows}
+    return [
+        {"rank": entry["rank"], "username": usernames.get(entry["user_id"]), "score": entry["score"]}
+        for entry in entries
+    ]
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(limit: int = 10, offset: int = 0):
+    """Get the top users by productivity score"""
+    limit = max(1, min(limit, 100))
+    entries = leaderboard.top(limit, max(0, offset))
+    return {
+        "leaderboard": await with_usernames(entries),
+        "ranked_users": len(leaderboard),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/leaderboard/me")
+async def get_my_leaderboard_position(session_token: str = None, radius: int = 5):
+    """Get the current user's rank and the users just above and below"""
+    user_id = await get_current_user(session_token)
+    await get_or_create_user(user_id)
+    
+    position = leaderboard.rank(user_id)
+    neighbors = await with_usernames(leaderboard.around(user_id, max(0, min(radius, 25))))
+    return {
+        "rank": position["rank"],
+        "score": position["score"],
+        "ranked_users": len(leaderboard),
+        "neighbors": neighbors
+    }
+
+# Longest range one time-series request may cover, in buckets
+MAX_SERIES_BUCKETS = {"hour": 24 * 31, "day": 366}
+
+def to_local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Offset-carrying query times as the naive local time logs are stamped in"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+@app.get("/api/productivity/timeseries")
+async def get_productivity_timeseries(session_token: str = None, bucket: str = "hour",
+                                      start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                      action: Optional[str] = None, scope: str = "user"):
+    """Get points and event counts per hour or day, for the current user or everyone"""
+    if bucket not in BUCKET_STEPS:
+        raise HTTPException(status_code=400, detail="bucket must be 'hour' or 'day'")
+    if scope not in ("user", "global"):
+        raise HTTPException(status_code=400, detail="scope must be 'user' or 'global'")
+    
+    end = to_local_naive(end) or datetime.now()
+    start = to_local_naive(start) or end - BUCKET_STEPS[bucket] * (24 if bucket == "hour" else 30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / BUCKET_STEPS[bucket] > MAX_SERIES_BUCKETS[bucket]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_SERIES_BUCKETS[bucket]} {bucket} buckets per request"
+        )
+    
+    user_id = ALL_USERS
+    if scope == "user":
+        user_id = await get_current_user(session_token)
+        await get_or_create_user(user_id)
+    
+    series = await productivity_rollup.series(user_id, bucket, start, end, action)
+    complete_through = productivity_rollup.complete_through
+    return {
+        "bucket": bucket,
+        "scope": scope,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": series,
+        "complete_through": complete_through.isoformat() if complete_through else None,
+        "retrieved_at": datetime.now().isoformat()
     }
 
 @app.get("/api/achievements")
 async def get_achievements(session_token: str = None):
     """Get user's achievements"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     
     query = "SELECT * FROM achievements WHERE user_id = %s ORDER BY unlocked DESC, created_at ASC"
@@ -1430,48 +1774,79 @@ async def get_achievements(session_token: str = None):
     
     return {"achievements": achievements}
 
-async def unlock_achievement(user_id: str, achievement_id: str):
+async def unlock_achievement(user_id: str, achievement_id: str, uow: Optional[UnitOfWork] = None):
     """Unlock an achievement for user"""
+    if uow is None:
+        # Flag, counter and bonus points must land together
+        async with db.transaction() as uow:
+            return await unlock_achievement(user_id, achievement_id, uow)
+    
     query = """
         UPDATE achievements 
         SET unlocked = TRUE, unlock_date = %s 
         WHERE user_id = %s AND id = %s AND unlocked = FALSE
     """
-    result = execute_query(query, (datetime.now(), user_id, achievement_id))
+    result = await uow.execute(query, (datetime.now(), user_id, achievement_id))
     
     if result > 0:  # If a row was updated
         # Update user achievement count
-        query = "UPDATE users SET achievements_unlocked = achievements_unlocked + 1 WHERE id = %s"
-        execute_query(query, (user_id,))
+        if hot_rows.is_hot(user_id):
+            buffer_hot_write(uow, lambda: hot_rows.increment(user_id, "achievements_unlocked", 1))
+        else:
+            query = "UPDATE users SET achievements_unlocked = achievements_unlocked + 1 WHERE id = %s"
+            await uow.execute(query, (user_id,))
+            user_changed(user_id, uow)
         
         # Award bonus points
-        await log_productivity_action(user_id, "achievement_unlocked", 50, {"achievement_id": achievement_id})
+        await log_productivity_action(user_id, "achievement_unlocked", 50, {"achievement_id": achievement_id}, uow)
         return True
     
     return False
 
+async def load_achievement_progress(user_id: str, uow: Optional[UnitOfWork] = None) -> Tuple[Dict[str, float], Set[str]]:
+    """Progress counters and unlocked achievements, once per user per TTL
+
+    Read on the event's transaction, which already holds a connection, rather
+    than taking more database slots while holding that one.
+    """
+    runner = uow or db
+    user = await load_user(user_id, uow) or {}
+    counts = await load_counters(user_id, uow)
+    query = "SELECT id FROM achievements WHERE user_id = %s AND unlocked = TRUE"
+    unlocked = {row["id"] for row in await runner.fetch_all(query, (user_id,))}
+    
+    savings_goal = float(user.get("savings_goal") or 5000.0)
+    counters = {
+        "applications": counts.get("applications") or 0,
+        "tasks_completed": counts.get("tasks_completed") or 0,
+        "savings_progress": float(user.get("current_savings") or 0) / savings_goal * 100,
+        "daily_streak": user.get("daily_streak") or 0,
+        "pong_high_score": user.get("pong_high_score") or 0,
+        "commands_executed": user.get("commands_executed") or 0,
+        "easter_eggs_found": user.get("easter_eggs_found") or 0,
+    }
+    return counters, unlocked
+
+# Achievement rules run on every productivity event against in-memory progress
+achievement_engine = AchievementEngine(
+    load_achievement_progress,
+    unlock_achievement,
+    ttl_seconds=float(os.environ.get('ACHIEVEMENT_PROGRESS_TTL_SECONDS', 300)),
+    max_users=int(os.environ.get('ACHIEVEMENT_PROGRESS_CACHE_SIZE', 10000))
+)
+
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(session_token: str = None):
     """Get real user dashboard statistics"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     user = await get_or_create_user(user_id)
     
-    # Get real counts from database
-    query = "SELECT COUNT(*) as count FROM applications WHERE user_id = %s"
-    apps_result = execute_query(query, (user_id,), fetch_one=True)
-    total_applications = apps_result['count'] if apps_result else 0
-    
-    query = "SELECT COUNT(*) as count FROM tasks WHERE user_id = %s"
-    tasks_result = execute_query(query, (user_id,), fetch_one=True)
-    total_tasks = tasks_result['count'] if tasks_result else 0
-    
-    query = "SELECT COUNT(*) as count FROM tasks WHERE user_id = %s AND status = 'completed'"
-    completed_result = execute_query(query, (user_id,), fetch_one=True)
-    completed_tasks = completed_result['count'] if completed_result else 0
-    
-    query = "SELECT COUNT(*) as count FROM achievements WHERE user_id = %s AND unlocked = TRUE"
-    achievements_result = execute_query(query, (user_id,), fetch_one=True)
-    unlocked_achievements = achievements_result['count'] if achievements_result else 0
+    # Counts maintained by the write paths, one primary-key read
+    counters = await load_counters(user_id)
+    total_applications = counters["applications"]
+    total_tasks = counters["tasks"]
+    completed_tasks = counters["tasks_completed"]
+    unlocked_achievements = user.get("achievements_unlocked") or 0
     
     # Calculate savings progress
     current_savings = user.get("current_savings", 0.0)
@@ -1503,7 +1878,7 @@ async def get_dashboard_stats(session_token: str = None):
 @app.get("/api/relocate/data")
 async def get_relocate_data(session_token: str = None):
     """Get relocation data from Relocate Me integration"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     
     # Fetch fresh data from Relocate Me service
@@ -1549,7 +1924,7 @@ async def get_relocate_data(session_token: str = None):
 @app.get("/api/relocate/properties")
 async def get_relocate_properties(session_token: str = None):
     """Get property listings from relocation data"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     
     # Get cached data first
@@ -1572,7 +1947,7 @@ async def get_relocate_properties(session_token: str = None):
 @app.get("/api/relocate/iframe")
 async def get_relocate_iframe(session_token: str = None):
     """Get iframe content for Relocate Me integration"""
-    user_id = get_current_user(session_token)
+    user_id = await get_current_user(session_token)
     await get_or_create_user(user_id)
     
     # Create iframe HTML that will load the Relocate Me site
@@ -1954,7 +2329,7 @@ async def populate_relocation_content():
         content_items = []
         
         # First, check if content already exists
-        existing_check = execute_query("SELECT COUNT(*) as count FROM site_content WHERE category = 'relocation'", fetch_one=True)
+        existing_check = await db.fetch_one("SELECT COUNT(*) as count FROM site_content WHERE category = 'relocation'")
         if existing_check and existing_check['count'] > 0:
             return {
                 "success": True,
@@ -2031,45 +2406,51 @@ async def populate_relocation_content():
             }
         ]
         
-        # Insert content with duplicate checking
-        for content in arizona_peak_resources:
-            # Check for existing slug
-            check_query = "SELECT id FROM site_content WHERE slug = %s"
-            existing = execute_query(check_query, (content["slug"],), fetch_one=True)
+        # Insert content with duplicate checking: one lookup and one batched
+        # insert per table, all in a single transaction
+        async with db.transaction() as uow:
+            slugs = [content["slug"] for content in arizona_peak_resources]
+            check_query = f"SELECT slug FROM site_content WHERE slug IN ({', '.join(['%s'] * len(slugs))})"
+            existing_slugs = {row["slug"] for row in await uow.fetch_all(check_query, tuple(slugs))}
+            new_content = [c for c in arizona_peak_resources if c["slug"] not in existing_slugs]
             
-            if not existing:
-                query = """
-                    INSERT INTO site_content (id, content_type, title, slug, content, excerpt, metadata, 
-                                            status, category, tags, view_count, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                params = (
+            query = """
+                INSERT INTO site_content (id, content_type, title, slug, content, excerpt, metadata, 
+                                        status, category, tags, view_count, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            rows = [
+                (
                     content["id"], content["content_type"], content["title"], content["slug"],
                     content["content"], content["excerpt"], content["metadata"], content["status"],
                     content["category"], content["tags"], content["view_count"], 
                     datetime.now(), datetime.now()
                 )
-                execute_query(query, params)
-                content_items.append(f"Site Content: {content['title']}")
-        
-        # Insert job resources with duplicate checking
-        for job in uk_remote_jobs:
+                for content in new_content
+            ]
+            await uow.execute_many(query, rows)
+            content_items.extend(f"Site Content: {content['title']}" for content in new_content)
+            
             # Check for existing title in same category
-            check_query = "SELECT id FROM job_resources WHERE title = %s AND category = %s"
-            existing = execute_query(check_query, (job["title"], job["category"]), fetch_one=True)
+            titles = [job["title"] for job in uk_remote_jobs]
+            check_query = f"SELECT title, category FROM job_resources WHERE title IN ({', '.join(['%s'] * len(titles))})"
+            existing_jobs = {(row["title"], row["category"]) for row in await uow.fetch_all(check_query, tuple(titles))}
+            new_jobs = [job for job in uk_remote_jobs if (job["title"], job["category"]) not in existing_jobs]
             
-            if not existing:
-                query = """
-                    INSERT INTO job_resources (id, title, url, description, category, tags, is_featured, rating, click_count, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                params = (
+            query = """
+                INSERT INTO job_resources (id, title, url, description, category, tags, is_featured, rating, click_count, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            rows = [
+                (
                     job["id"], job["title"], job["url"], job["description"], job["category"],
                     job["tags"], job["is_featured"], job["rating"], job["click_count"],
                     datetime.now(), datetime.now()
                 )
-                execute_query(query, params)
-                content_items.append(f"Job Resource: {job['title']}")
+                for job in new_jobs
+            ]
+            await uow.execute_many(query, rows)
+            content_items.extend(f"Job Resource: {job['title']}" for job in new_jobs)
         
         return {
             "success": True,
@@ -2200,11 +2581,12 @@ async def get_database_status():
         
         return {
             "status": "connected",
-            "database_type": "MySQL/MariaDB",
+            "database_type": "SQLite" if sqlite_backend else "MySQL/MariaDB",
             "host": DB_CONFIG['host'],
-            "database": DB_CONFIG['database'],
+            "database": sqlite_backend.info() if sqlite_backend else DB_CONFIG['database'],
             "tables": tables_info,
             "total_records": sum(tables_info.values()),
+            "connection_pool": db_pool.stats(),
             "migration_status": "completed",
             "relocation_focus": "Arizona to Peak District",
             "features": [
@@ -2272,15 +2654,185 @@ async def get_database_status():
             "migration_status": "failed"
         }
 
+@app.get("/api/admin/query-stats")
+async def get_query_stats(limit: int = 20, sort_by: str = "total_ms"):
+    """Top-N SQL statements by latency, with the recent slow-query log"""
+    return {
+        "success": True,
+        "summary": query_metrics.summary(),
+        "statement_cache": db_pool.stats()["statement_cache"],
+        "sort_by": sort_by if sort_by in QueryMetrics.SORT_KEYS else "total_ms",
+        "statements": query_metrics.top(limit, sort_by),
+        "slow_queries": query_metrics.slow_queries(limit),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.post("/api/admin/query-stats/reset")
+async def reset_query_stats():
+    """Clear collected statement metrics"""
+    query_metrics.reset()
+    return {"success": True, "message": "Query statistics reset"}
+
+@app.get("/api/database/replicas")
+async def get_database_replicas():
+    """Get read-replica health, lag and routing counters"""
+    return {
+        "success": True,
+        "routing": replica_router.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/admin/session-stats")
+async def get_session_stats():
+    """Get session cache, unknown-token filtering and last_used write-behind status"""
+    return {
+        "success": True,
+        "store": session_store.stats(),
+        "last_used_writes": session_touches.stats(),
+        "negative_cache": unknown_tokens.stats(),
+        "bloom_filter": token_filter.stats() if token_filter is not None else None,
+        "reaper": session_reaper.stats(),
+        "signed_tokens": {**signed_tokens.stats(), **revoked_tokens.stats()} if signed_tokens is not None else None,
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.post("/api/admin/sessions/reap")
+async def reap_sessions():
+    """Delete expired and logged-out sessions now"""
+    reaped = await session_reaper.reap()
+    if reaped and token_filter is not None:
+        await load_token_filter()
+    return {
+        "success": True,
+        "rows_reaped": reaped,
+        "reaper": session_reaper.stats()
+    }
+
+@app.post("/api/admin/counters/reconcile")
+async def reconcile_counters():
+    """Recount every user's dashboard counters now and repair drift"""
+    repaired = await counter_reconciler.reconcile()
+    return {
+        "success": True,
+        "users_repaired": repaired,
+        "reconciler": counter_reconciler.stats()
+    }
+
+@app.get("/api/admin/user-cache")
+async def get_user_cache_stats():
+    """Get identity map and profile cache hit rates, daily activity skips and hot row buffering"""
+    return {
+        "success": True,
+        "cache": user_cache.stats(),
+        "daily_activity": users_active_today.stats(),
+        "hot_rows": hot_rows.stats(),
+        "hot_counters": hot_counters.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/admin/productivity-events")
+async def get_productivity_event_stats():
+    """Get productivity event queue depth, batch sizes and write lag"""
+    return {
+        "success": True,
+        "pipeline": productivity_events.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/admin/productivity-rollups")
+async def get_productivity_rollup_stats():
+    """Get productivity rollup watermark, rows rolled up and run timings"""
+    return {
+        "success": True,
+        "rollup": productivity_rollup.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.post("/api/admin/productivity-rollups/run")
+async def run_productivity_rollup():
+    """Roll up settled productivity log rows now"""
+    rolled_up = await productivity_rollup.roll_up()
+    return {
+        "success": True,
+        "rows_rolled_up": rolled_up,
+        "rollup": productivity_rollup.stats()
+    }
+
+@app.get("/api/admin/leaderboard")
+async def get_leaderboard_stats():
+    """Get leaderboard size, delta and rebuild counts"""
+    return {
+        "success": True,
+        "leaderboard": leaderboard.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/admin/achievement-engine")
+async def get_achievement_engine_stats():
+    """Get achievement rule engine event, load and unlock counts"""
+    return {
+        "success": True,
+        "engine": achievement_engine.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/admin/password-hashing")
+async def get_password_hashing_stats():
+    """Get password hashing worker load, queue depth and latency"""
+    return {
+        "success": True,
+        "hashing": password_hasher.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
+@app.get("/api/database/pool")
+async def get_database_pool_stats():
+    """Get connection pool sizing and checkout/wait metrics"""
+    return {
+        "success": True,
+        "pool": db_pool.stats(),
+        "retrieved_at": datetime.now().isoformat()
+    }
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and refresh jobs on startup"""
     try:
+        # Tables added since the database was created, and their backfills,
+        # before any background job reads them
+        await apply_upgrades(db, create_tables=sqlite_backend is None)
+    except Exception as e:
+        logger.error(f"Schema upgrade failed: {e}")
+    
+    replica_router.start()
+    session_touches.start()
+    session_reaper.start()
+    productivity_events.start()
+    leaderboard.start(load_leaderboard_scores)
+    hot_rows.start()
+    hot_counters.start()
+    counter_reconciler.start()
+    productivity_rollup.start()
+    if signed_tokens is not None:
+        revoked_tokens.start(load_revoked_tokens, float(os.environ.get('SESSION_REVOCATION_SYNC_SECONDS', 10)))
+    await password_hasher.start()
+    
+    try:
+        await default_password_hash()
+        
         # Test database connection
         query = "SELECT 1"
         execute_query(query, fetch_one=True)
-        logger.info("MySQL database connection established successfully")
+        logger.info(f"Database connection established successfully ({DB_BACKEND})")
+        
+        if token_filter is not None:
+            await load_token_filter()
+        
+        await leaderboard.rebuild(load_leaderboard_scores)
+        
+        if signed_tokens is not None:
+            await revoked_tokens.sync(load_revoked_tokens)
         
         # Refresh jobs if database is empty
         query = "SELECT COUNT(*) as count FROM jobs WHERE source = 'Remotive'"
@@ -2294,6 +2846,24 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Startup error: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered writes, drain the database executor and release pooled connections"""
+    await replica_router.stop()
+    await session_reaper.stop()
+    await revoked_tokens.stop()
+    await session_touches.stop()
+    await counter_reconciler.stop()
+    await productivity_rollup.stop()
+    await productivity_events.stop()
+    await leaderboard.stop()
+    await hot_rows.stop()
+    await hot_counters.stop()
+    await session_store.close()
+    password_hasher.shutdown()
+    db.shutdown()
+    db_pool.close_all()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
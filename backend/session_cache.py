@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Session Cache for ThriveRemoteOS
+Bounded in-memory session lookup with per-entry expiry and LRU eviction,
+negative caching of unknown tokens, and write-behind batching of last_used
+"""
+
+import asyncio
+import hashlib
+import math
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """Token -> session dict, expiring at the session's own expires_at"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Live session for the token, or None; expired entries are dropped on sight"""
+        with self._lock:
+            session = self._entries.get(token)
+            if session is None:
+                self.misses += 1
+                return None
+            if session["expires_at"] <= datetime.now():
+                del self._entries[token]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return session
+
+    def put(self, token: str, session: Dict[str, Any]):
+        """Cache a session; it must carry an expires_at datetime"""
+        with self._lock:
+            self._entries[token] = session
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, token: str) -> bool:
+        with self._lock:
+            return self._entries.pop(token, None) is not None
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry (a full scan; get() already handles the hot path)"""
+        now = datetime.now()
+        with self._lock:
+            expired = [token for token, session in self._entries.items() if session["expires_at"] <= now]
+            for token in expired:
+                del self._entries[token]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+class NegativeTokenCache:
+    """Tokens recently found missing, inactive or expired, remembered for a short TTL"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_size: int = 50000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.evictions = 0
+
+    def contains(self, token: str) -> bool:
+        with self._lock:
+            expires = self._entries.get(token)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._entries[token]
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, token: str):
+        with self._lock:
+            self._entries[token] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+class TokenBloomFilter:
+    """Bloom filter over issued session tokens
+
+    A negative answer means the token was never issued by this process, so
+    it can be rejected without a database lookup. Only sound when one
+    process issues every token (a single API worker).
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.rejections = 0
+        self._added_during_rebuild: Optional[List[str]] = None
+        # Until rebuild() has loaded the live tokens, nothing can be ruled out
+        self.ready = False
+
+    def _positions(self, token: str):
+        digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, token: str):
+        positions = self._positions(token)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(token)
+        if self.count == self.capacity + 1:
+            logger.warning(f"Session Bloom filter is over capacity ({self.capacity}); false positives will rise")
+
+    def might_contain(self, token: str) -> bool:
+        if not self.ready:
+            return True
+        bits = self._bits
+        for position in self._positions(token):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                self.rejections += 1
+                return False
+        return True
+
+    def rebuild(self, tokens: Iterable[str]):
+        """Replace the contents with the given tokens (e.g. all live sessions)"""
+        with self._lock:
+            self._added_during_rebuild = []
+        fresh = TokenBloomFilter(self.capacity, self.error_rate)
+        for token in tokens:
+            fresh.add(token)
+        with self._lock:
+            # Tokens issued while the rebuild ran must not be lost
+            for token in self._added_during_rebuild:
+                fresh.add(token)
+            self._bits = fresh._bits
+            self.count = fresh.count
+            self._added_during_rebuild = None
+            self.ready = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "tokens": self.count,
+            "capacity": self.capacity,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "target_error_rate": self.error_rate,
+            "rejections": self.rejections,
+        }
+
+
+class SessionTouchBuffer:
+    """Write-behind buffer for user_sessions.last_used
+
+    Touches are coalesced per token in memory and written periodically as
+    one CASE-based UPDATE per batch, so the database sees one write per
+    active session per interval rather than one per request.
+    """
+
+    def __init__(self, write_fn: Callable[[str, Tuple], Awaitable[int]],
+                 flush_interval: float = 30.0, batch_size: int = 500):
+        self._write = write_fn
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.touches = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def touch(self, token: str, when: Optional[datetime] = None):
+        """Record that a session was used; repeat touches keep the latest time"""
+        when = when or datetime.now()
+        with self._lock:
+            previous = self._pending.get(token)
+            if previous is None or when > previous:
+                self._pending[token] = when
+            self.touches += 1
+
+    def discard(self, token: str):
+        """Forget a pending touch (the session is going away)"""
+        with self._lock:
+            self._pending.pop(token, None)
+
+    def _requeue(self, entries: List[Tuple[str, datetime]]):
+        with self._lock:
+            for token, when in entries:
+                previous = self._pending.get(token)
+                if previous is None or when > previous:
+                    self._pending[token] = when
+
+    @staticmethod
+    def build_update(entries: List[Tuple[str, datetime]]) -> Tuple[str, Tuple]:
+        """One UPDATE setting each token's last_used via CASE"""
+        cases = " ".join("WHEN %s THEN %s" for _ in entries)
+        placeholders = ", ".join(["%s"] * len(entries))
+        query = (
+            f"UPDATE user_sessions SET last_used = CASE token {cases} END "
+            f"WHERE token IN ({placeholders}) AND active = TRUE"
+        )
+        params = [value for entry in entries for value in entry]
+        params.extend(token for token, _ in entries)
+        return query, tuple(params)
+
+    async def flush(self) -> int:
+        """Write every pending touch; failed batches are kept for the next flush"""
+        async with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            entries = list(pending.items())
+            written = 0
+            for start in range(0, len(entries), self.batch_size):
+                batch = entries[start:start + self.batch_size]
+                try:
+                    query, params = self.build_update(batch)
+                    written += await self._write(query, params) or 0
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Session last_used flush failed, retrying next interval: {e}")
+                    self._requeue(entries[start:])
+                    break
+
+            self.flushes += 1
+            self.rows_written += written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return written
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Begin periodic flushing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "touches": self.touches,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "flush_interval_seconds": self.flush_interval,
+        }
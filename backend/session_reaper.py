@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Session Reaper for ThriveRemoteOS
+Background task that deletes expired and logged-out rows from user_sessions
+in small batches so the table and its token index stop growing forever
+"""
+
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from async_db import AsyncDatabase
+from db_replicas import read_primary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SessionReaper:
+    """Select-then-delete by primary key, one short statement per batch"""
+
+    def __init__(
+        self,
+        database: AsyncDatabase,
+        on_reaped: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        interval: float = 3600.0,
+        reap_inactive: bool = True,
+    ):
+        self._db = database
+        self._on_reaped = on_reaped
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause
+        self.interval = interval
+        # Logged-out rows double as the revocation record for signed tokens,
+        # so they may need to live until they expire
+        self.reap_inactive = reap_inactive
+        self._task: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.total_reaped = 0
+        self.last_reaped = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+
+    async def reap(self) -> int:
+        """Delete every dead session now; returns rows removed"""
+        async with self._running, read_primary():
+            started = time.perf_counter()
+            cutoff = datetime.now()
+            reaped = 0
+            try:
+                while True:
+                    condition = "expires_at < %s OR active = FALSE" if self.reap_inactive else "expires_at < %s"
+                    query = f"""
+                        SELECT id, token FROM user_sessions
+                        WHERE {condition}
+                        LIMIT %s
+                    """
+                    rows = await self._db.fetch_all(query, (cutoff, self.batch_size))
+                    if not rows:
+                        break
+
+                    ids = [row["id"] for row in rows]
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    query = f"DELETE FROM user_sessions WHERE id IN ({placeholders})"
+                    reaped += await self._db.execute(query, tuple(ids))
+
+                    if self._on_reaped is not None:
+                        await self._on_reaped([row["token"] for row in rows])
+
+                    if len(rows) < self.batch_size:
+                        break
+                    # Let other writers at the table between batches
+                    await asyncio.sleep(self.batch_pause)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Session reaper failed after {reaped} rows: {e}")
+            finally:
+                self.runs += 1
+                self.last_reaped = reaped
+                self.total_reaped += reaped
+                self.last_run_at = cutoff
+                self.last_duration_ms = (time.perf_counter() - started) * 1000
+
+            if reaped:
+                logger.info(f"Reaped {reaped} expired sessions in {self.last_duration_ms:.0f} ms")
+            return reaped
+
+    async def _reap_loop(self):
+        while True:
+            await self.reap()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic reaping on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "total_reaped": self.total_reaped,
+            "last_reaped": self.last_reaped,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "batch_size": self.batch_size,
+            "batch_pause_seconds": self.batch_pause,
+            "interval_seconds": self.interval,
+        }
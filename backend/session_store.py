@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Session Store for ThriveRemoteOS
+Pluggable session lookup: per-process (SessionCache) or shared between
+workers through a Redis-protocol server
+"""
+
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from session_cache import SessionCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DATETIME_FIELDS = ("created_at", "last_used", "expires_at")
+
+
+class SessionStore(ABC):
+    """Interface for token -> session dict storage; sessions carry expires_at"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """The session for token, or None if unknown or expired"""
+
+    @abstractmethod
+    async def put(self, token: str, session: Dict[str, Any]):
+        """Store or replace the session for token"""
+
+    @abstractmethod
+    async def discard(self, token: str):
+        """Forget token; unknown tokens are ignored"""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class InProcessSessionStore(SessionStore):
+    """Bounded TTL/LRU cache private to this worker process"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 10000):
+        self.cache = SessionCache(max_size=max_size)
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(token)
+
+    async def put(self, token: str, session: Dict[str, Any]):
+        self.cache.put(token, session)
+
+    async def discard(self, token: str):
+        self.cache.discard(token)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.cache.stats()}
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions shared by every worker (and host) through Redis or a compatible server
+
+    Keys expire server-side at the session's expires_at, and a logout in one
+    worker is visible to all of them. When the server is unreachable, lookups
+    miss and callers fall back to the database.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "thriveremote:session:",
+                 max_connections: int = 20, socket_timeout: float = 0.5):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("SESSION_STORE=redis requires the 'redis' package (pip install redis)")
+
+        self.url = url
+        self.key_prefix = key_prefix
+        self._client = redis_asyncio.Redis.from_url(
+            url,
+            max_connections=max_connections,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, token: str) -> str:
+        return self.key_prefix + token
+
+    @staticmethod
+    def _encode(session: Dict[str, Any]) -> str:
+        return json.dumps({
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in session.items()
+        })
+
+    @staticmethod
+    def _decode(payload: str) -> Dict[str, Any]:
+        session = json.loads(payload)
+        for field in _DATETIME_FIELDS:
+            if session.get(field):
+                session[field] = datetime.fromisoformat(session[field])
+        return session
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            payload = await self._client.get(self._key(token))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Session store read failed, falling back to database: {e}")
+            return None
+        if payload is None:
+            self.misses += 1
+            return None
+        session = self._decode(payload)
+        if session["expires_at"] <= datetime.now():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return session
+
+    async def put(self, token: str, session: Dict[str, Any]):
+        ttl = int((session["expires_at"] - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+        try:
+            await self._client.set(self._key(token), self._encode(session), ex=ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Session store write failed: {e}")
+
+    async def discard(self, token: str):
+        try:
+            await self._client.delete(self._key(token))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Session store delete failed: {e}")
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+        }
+
+
+def create_session_store_from_env() -> SessionStore:
+    """SESSION_STORE=memory (default) or redis with SESSION_STORE_URL"""
+    backend = os.environ.get("SESSION_STORE", "memory").lower()
+    if backend == "redis":
+        url = os.environ.get("SESSION_STORE_URL", "redis://localhost:6379/0")
+        logger.info(f"Using shared session store at {url.split('@')[-1]}")
+        return RedisSessionStore(
+            url,
+            key_prefix=os.environ.get("SESSION_STORE_PREFIX", "thriveremote:session:"),
+            max_connections=int(os.environ.get("SESSION_STORE_MAX_CONNECTIONS", 20)),
+        )
+    return InProcessSessionStore(max_size=int(os.environ.get("SESSION_CACHE_SIZE", 10000)))
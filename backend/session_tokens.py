@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Signed Session Tokens for ThriveRemoteOS
+Stateless tokens carrying user_id and expiry under an HMAC-SHA256 signature,
+validated without a database or session store lookup
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_PREFIX = "v1."
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SignedTokenCodec:
+    """Issues and verifies v1.<payload>.<signature> tokens
+
+    The first key signs; every key verifies, so keys can be rotated by
+    prepending a new one and dropping the old one after a token lifetime.
+    """
+
+    def __init__(self, keys: List[bytes]):
+        if not keys:
+            raise ValueError("At least one signing key is required")
+        self._keys = keys
+        self.issued = 0
+        self.verified = 0
+        self.rejected = 0
+
+    @staticmethod
+    def is_signed(token: str) -> bool:
+        return token.startswith(TOKEN_PREFIX)
+
+    def _sign(self, key: bytes, payload: str) -> bytes:
+        return hmac.new(key, payload.encode(), hashlib.sha256).digest()
+
+    def issue(self, user_id: str, expires_at: datetime) -> str:
+        # The nonce keeps tokens unique per login, for revocation and user_sessions.token
+        payload = _b64encode(f"{user_id}|{int(expires_at.timestamp())}|{secrets.token_hex(8)}".encode())
+        self.issued += 1
+        return f"{TOKEN_PREFIX}{payload}.{_b64encode(self._sign(self._keys[0], payload))}"
+
+    def verify(self, token: str) -> Optional[Tuple[str, datetime]]:
+        """(user_id, expires_at) for an authentic, unexpired token, else None"""
+        try:
+            payload, signature = token[len(TOKEN_PREFIX):].split(".")
+            signature = _b64decode(signature)
+            if not any(hmac.compare_digest(self._sign(key, payload), signature) for key in self._keys):
+                self.rejected += 1
+                return None
+            user_id, expires, _ = _b64decode(payload).decode().split("|")
+            expires_at = datetime.fromtimestamp(int(expires))
+        except (ValueError, UnicodeDecodeError):
+            self.rejected += 1
+            return None
+        if expires_at <= datetime.now():
+            self.rejected += 1
+            return None
+        self.verified += 1
+        return user_id, expires_at
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "issued": self.issued,
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+class RevocationList:
+    """Logged-out signed tokens, each kept only until it would have expired anyway
+
+    Logouts handled by other workers are picked up by polling the database
+    through the loader passed to start().
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.last_sync: Optional[datetime] = None
+
+    def revoke(self, token: str, expires_at: datetime):
+        with self._lock:
+            self._revoked[token] = expires_at
+
+    def is_revoked(self, token: str) -> bool:
+        with self._lock:
+            if token in self._revoked:
+                self.hits += 1
+                return True
+            return False
+
+    def purge(self) -> int:
+        """Forget revocations for tokens that have expired"""
+        now = datetime.now()
+        with self._lock:
+            expired = [token for token, expires_at in self._revoked.items() if expires_at <= now]
+            for token in expired:
+                del self._revoked[token]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def sync(self, loader: Callable[[Optional[datetime]], Awaitable[List[Tuple[str, datetime]]]]):
+        """Add revocations recorded since the last sync (all live ones on the first call)"""
+        since, started = self.last_sync, datetime.now()
+        for token, expires_at in await loader(since):
+            self.revoke(token, expires_at)
+        self.last_sync = started
+        self.purge()
+
+    async def _sync_loop(self, loader, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync(loader)
+            except Exception as e:
+                logger.error(f"Revocation sync failed: {e}")
+
+    def start(self, loader, interval: float):
+        """Poll for revocations on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sync_loop(loader, interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+        }
+
+
+def parse_signing_keys(value: str) -> List[bytes]:
+    """Comma-separated signing keys, newest first"""
+    return [key.strip().encode() for key in value.split(",") if key.strip()]
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite Backend for ThriveRemoteOS
+Runs the MySQL schema and queries on a local SQLite file (WAL mode) through a
+small dialect shim, for hermetic benchmarking and single-node deployments
+"""
+
+import re
+import sqlite3
+import threading
+import uuid
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tuned for a single-host API server: WAL lets readers run alongside the writer
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+
+def _convert_datetime(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _convert_decimal(value: bytes):
+    try:
+        return Decimal(value.decode())
+    except Exception:
+        return value.decode()
+
+
+# Return the same Python types mysql.connector does
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_datetime)
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("DECIMAL", _convert_decimal)
+
+
+# ---------------------------------------------------------------------------
+# Dialect shim
+# ---------------------------------------------------------------------------
+
+_LITERAL_SPLIT = re.compile(r"('(?:[^'\\]|\\.|'')*')")
+_QUERY_REWRITES = (
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.I), r"excluded.\1"),
+    (re.compile(r"\bNOW\(\)", re.I), "DATETIME('now', 'localtime')"),
+    (re.compile(r"\bCURDATE\(\)", re.I), "DATE('now', 'localtime')"),
+    (re.compile(r"\bGREATEST\(", re.I), "MAX("),
+    (re.compile(r"\bLEAST\(", re.I), "MIN("),
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.I), ""),
+)
+
+
+@lru_cache(maxsize=1024)
+def translate_query(query: str) -> str:
+    """Rewrite a MySQL statement for SQLite, leaving string literals untouched"""
+    parts = _LITERAL_SPLIT.split(query)
+    for index in range(0, len(parts), 2):  # even indexes are outside literals
+        part = parts[index].replace("%s", "?")
+        for pattern, replacement in _QUERY_REWRITES:
+            part = pattern.sub(replacement, part)
+        parts[index] = part
+    return "".join(parts)
+
+
+_INLINE_INDEX = re.compile(r"^\s*(?:UNIQUE\s+)?INDEX\s+(\w+)\s*\(([^)]*)\)\s*,?\s*$", re.I)
+_CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(\w+)", re.I)
+
+
+def translate_schema(mysql_ddl: str) -> str:
+    """Convert database_migration.sql into SQLite DDL plus seed data"""
+    statements = []
+    ddl = re.sub(r"--[^\n]*", "", mysql_ddl)
+
+    for raw_statement in ddl.split(";"):
+        statement = raw_statement.strip()
+        if not statement or re.match(r"USE\s", statement, re.I):
+            continue
+
+        table_match = _CREATE_TABLE.match(statement)
+        if not table_match:
+            statements.append(statement)
+            continue
+
+        table = table_match.group(1)
+        indexes = []
+        lines = []
+        for line in statement.splitlines():
+            index_match = _INLINE_INDEX.match(line)
+            if index_match:
+                # SQLite index names are global, MySQL's are per table
+                indexes.append(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{index_match.group(1)} "
+                    f"ON {table} ({index_match.group(2)})"
+                )
+                continue
+            line = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", line, flags=re.I)
+            line = re.sub(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", "", line, flags=re.I)
+            line = re.sub(r"\bJSON\b", "TEXT", line)
+            # MySQL's CURRENT_TIMESTAMP is session-local time, SQLite's is UTC
+            line = re.sub(r"\bDEFAULT\s+CURRENT_TIMESTAMP\b", "DEFAULT (DATETIME('now', 'localtime'))", line, flags=re.I)
+            lines.append(line)
+
+        body = "\n".join(lines)
+        # Dropping trailing INDEX lines can leave a dangling comma before ")"
+        body = re.sub(r",\s*\)\s*$", "\n)", body)
+        body = re.sub(r"CREATE\s+TABLE\s+", "CREATE TABLE IF NOT EXISTS ", body, count=1, flags=re.I)
+        statements.append(body)
+        statements.extend(indexes)
+
+    return ";\n".join(statements) + ";\n"
+
+
+# ---------------------------------------------------------------------------
+# mysql.connector-compatible connection
+# ---------------------------------------------------------------------------
+
+class SQLiteCursor:
+    """Cursor exposing the subset of the mysql.connector cursor API the server uses"""
+
+    def __init__(self, connection: sqlite3.Connection, dictionary: bool = False):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def execute(self, query: str, params: Sequence = None):
+        self._cursor.execute(translate_query(query), tuple(params) if params else ())
+
+    def executemany(self, query: str, rows: Sequence[Sequence]):
+        self._cursor.executemany(translate_query(query), rows)
+
+    def fetchone(self) -> Optional[Any]:
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Autocommit connection with explicit transactions, like DB_CONFIG's MySQL one"""
+
+    def __init__(self, raw: sqlite3.Connection):
+        self._raw = raw
+
+    def cursor(self, dictionary: bool = False, buffered: bool = False, prepared: bool = False) -> SQLiteCursor:
+        # sqlite3 keeps its own per-connection statement cache, so prepared
+        # and buffered cursors need no special handling
+        return SQLiteCursor(self._raw, dictionary=dictionary)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._raw.in_transaction
+
+    def start_transaction(self):
+        # Take the write lock up front; a deferred transaction that later
+        # upgrades can fail with SQLITE_BUSY without waiting
+        self._raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.execute("COMMIT")
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute("ROLLBACK")
+
+    def ping(self, reconnect: bool = False):
+        self._raw.execute("SELECT 1").fetchone()
+
+    def is_connected(self) -> bool:
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteBackend:
+    """Opens tuned SQLite connections and creates the schema on first use"""
+
+    def __init__(self, path: str, schema_path: Optional[Path] = None, cached_statements: int = 256):
+        self.path = str(path)
+        self.schema_path = schema_path
+        self.cached_statements = cached_statements
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        raw = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,  # autocommit; transactions are explicit
+            check_same_thread=False,  # pooled connections move between worker threads
+            cached_statements=self.cached_statements,
+            uri=self.path.startswith("file:"),
+        )
+        raw.create_function("UUID", 0, lambda: str(uuid.uuid4()))
+        for pragma in PRAGMAS:
+            raw.execute(pragma)
+        return raw
+
+    def ensure_schema(self, raw: sqlite3.Connection):
+        with self._lock:
+            if self._schema_ready or self.schema_path is None:
+                return
+            exists = raw.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+            ).fetchone()
+            script = translate_schema(Path(self.schema_path).read_text())
+            if not exists:
+                logger.info(f"Creating SQLite schema in {self.path}")
+            else:
+                # Only pick up tables added to the schema since the file was
+                # created; seed rows were inserted the first time round
+                script = "".join(
+                    statement + ";\n" for statement in script.split(";\n")
+                    if statement.lstrip().upper().startswith("CREATE")
+                )
+            raw.executescript("BEGIN;\n" + script + "COMMIT;")
+            self._schema_ready = True
+
+    def connect(self) -> SQLiteConnection:
+        raw = self._open()
+        self.ensure_schema(raw)
+        return SQLiteConnection(raw)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "sqlite_version": sqlite3.sqlite_version,
+            "pragmas": list(PRAGMAS),
+        }
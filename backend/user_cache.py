@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+User Row Caching for ThriveRemoteOS
+A per-request identity map (each users row loaded at most once per request)
+in front of a short-TTL profile cache shared across requests, plus the set of
+users whose daily activity has already been recorded
+"""
+
+import contextvars
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_identity_map: contextvars.ContextVar[Optional[Dict[str, Dict]]] = contextvars.ContextVar(
+    "user_identity_map", default=None
+)
+
+
+def begin_request() -> contextvars.Token:
+    """Start an empty identity map for one request"""
+    return _identity_map.set({})
+
+
+def end_request(token: contextvars.Token):
+    _identity_map.reset(token)
+
+
+class UserCache:
+    """users rows by id: request identity map first, then the cross-request TTL cache
+
+    Rows handed out are copies, so callers may modify them freely. Any write
+    to a user must call invalidate(), after commit when inside a transaction.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max(1, max_size)
+        self._profiles: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.identity_hits = 0
+        self.profile_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        identity_map = _identity_map.get()
+        if identity_map is not None and user_id in identity_map:
+            self.identity_hits += 1
+            return dict(identity_map[user_id])
+
+        row = None
+        if self.ttl_seconds > 0:
+            with self._lock:
+                entry = self._profiles.get(user_id)
+                if entry is not None:
+                    if entry[0] > time.monotonic():
+                        self._profiles.move_to_end(user_id)
+                        row = entry[1]
+                    else:
+                        del self._profiles[user_id]
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.profile_hits += 1
+        if identity_map is not None:
+            identity_map[user_id] = row
+        return dict(row)
+
+    def put(self, user_id: str, row: Dict[str, Any], shared: bool = True):
+        """Remember a row freshly read from the database
+
+        Rows read inside a transaction may hold uncommitted changes and are
+        kept to the request (shared=False).
+        """
+        row = dict(row)
+        identity_map = _identity_map.get()
+        if identity_map is not None:
+            identity_map[user_id] = row
+        if shared and self.ttl_seconds > 0:
+            with self._lock:
+                self._profiles[user_id] = (time.monotonic() + self.ttl_seconds, row)
+                self._profiles.move_to_end(user_id)
+                while len(self._profiles) > self.max_size:
+                    self._profiles.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """Forget a user after a write to their row"""
+        identity_map = _identity_map.get()
+        if identity_map is not None:
+            identity_map.pop(user_id, None)
+        with self._lock:
+            self._profiles.pop(user_id, None)
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.identity_hits + self.profile_hits + self.misses
+        return {
+            "profiles_cached": len(self._profiles),
+            "ttl_seconds": self.ttl_seconds,
+            "identity_map_hits": self.identity_hits,
+            "profile_cache_hits": self.profile_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.identity_hits + self.profile_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class DailyTouchSet:
+    """Users whose activity/streak row was already updated today
+
+    Cleared when the date rolls over, so it holds at most one day's active users.
+    """
+
+    def __init__(self):
+        self._day: Optional[date] = None
+        self._users = set()
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def seen(self, user_id: str, today: date) -> bool:
+        with self._lock:
+            if self._day != today:
+                self._day = today
+                self._users = set()
+            if user_id in self._users:
+                self.skipped += 1
+                return True
+            return False
+
+    def add(self, user_id: str, today: date):
+        with self._lock:
+            if self._day != today:
+                self._day = today
+                self._users = set()
+            self._users.add(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"touched_today": len(self._users), "updates_skipped": self.skipped}
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+User Counters for ThriveRemoteOS
+Per-user application and task counts kept in user_counters by the write
+paths, and a background reconciler that recounts them to repair drift
+"""
+
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from async_db import AsyncDatabase
+from db_replicas import read_primary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = ("applications", "tasks", "tasks_completed")
+
+
+def build_increment(user_id: str, deltas: Dict[str, int]) -> Tuple[str, Tuple]:
+    """Upsert adding deltas to a user's counters, creating the row on first use"""
+    columns = [column for column in deltas if column in COUNTER_COLUMNS]
+    if len(columns) != len(deltas):
+        raise ValueError(f"Unknown counter in {sorted(deltas)}")
+    query = f"""
+        INSERT INTO user_counters (user_id, {', '.join(columns)})
+        VALUES (%s, {', '.join(['%s'] * len(columns))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{column} = {column} + VALUES({column})' for column in columns)}
+    """
+    return query, (user_id,) + tuple(deltas[column] for column in columns)
+
+
+class CounterReconciler:
+    """Recounts users in primary-key batches and corrects only rows that drifted
+
+    Corrections are applied as deltas, and only while the row still holds
+    the values read: when every worker reconciles at once, the first to
+    repair a row wins and the others skip it, and writes that land while a
+    batch is being recounted are never overwritten. stored_view
+    lets the caller fold in increments it has buffered but not yet written.
+    users.achievements_unlocked, kept by unlock_achievement, is repaired too.
+    """
+
+    def __init__(
+        self,
+        database: AsyncDatabase,
+        stored_view: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        on_repaired: Optional[Callable[[List[str]], None]] = None,
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        interval: float = 3600.0,
+    ):
+        self._db = database
+        self._stored_view = stored_view
+        self._on_repaired = on_repaired
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.conflicts = 0
+        self.total_repaired = 0
+        self.last_checked = 0
+        self.last_repaired = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+
+    async def _repair(self, row: Dict[str, Any]) -> bool:
+        stored = self._stored_view(row) if self._stored_view is not None else row
+        drift = {
+            column: row[f"actual_{column}"] - (stored.get(column) or 0)
+            for column in COUNTER_COLUMNS
+        }
+        user_id = row["user_id"]
+        repaired = False
+        if not row["has_counters"]:
+            # A first write or another worker's repair may create it first
+            query = f"""
+                INSERT IGNORE INTO user_counters (user_id, {', '.join(COUNTER_COLUMNS)})
+                VALUES (%s, {', '.join(['%s'] * len(COUNTER_COLUMNS))})
+            """
+            params = (user_id,) + tuple(drift[column] for column in COUNTER_COLUMNS)
+            repaired = await self._apply(query, params)
+        elif any(drift.values()):
+            query = f"""
+                UPDATE user_counters SET {', '.join(f'{column} = {column} + %s' for column in COUNTER_COLUMNS)}
+                WHERE user_id = %s AND {' AND '.join(f'COALESCE({column}, 0) = %s' for column in COUNTER_COLUMNS)}
+            """
+            params = (
+                tuple(drift[column] for column in COUNTER_COLUMNS) + (user_id,)
+                + tuple(row[column] or 0 for column in COUNTER_COLUMNS)
+            )
+            repaired = await self._apply(query, params)
+
+        achievements_drift = row["actual_achievements_unlocked"] - (stored.get("achievements_unlocked") or 0)
+        if achievements_drift:
+            query = """
+                UPDATE users SET achievements_unlocked = achievements_unlocked + %s
+                WHERE id = %s AND COALESCE(achievements_unlocked, 0) = %s
+            """
+            params = (achievements_drift, user_id, row["achievements_unlocked"] or 0)
+            repaired = await self._apply(query, params) or repaired
+        return repaired
+
+    async def _apply(self, query: str, params: Tuple) -> bool:
+        """Run a repair conditional on the values read; False if they changed since"""
+        if await self._db.execute(query, params):
+            return True
+        # Another worker repaired it first, or a write landed mid-recount;
+        # the next run recounts it
+        self.conflicts += 1
+        return False
+
+    async def reconcile(self) -> int:
+        """Recount every user now; returns users whose counters were repaired"""
+        async with self._running, read_primary():
+            started = time.perf_counter()
+            run_at = datetime.now()
+            checked = repaired = 0
+            try:
+                last_id = ""
+                while True:
+                    query = """
+                        SELECT u.id, u.id AS user_id, u.achievements_unlocked,
+                            c.user_id IS NOT NULL AS has_counters,
+                            c.applications, c.tasks, c.tasks_completed,
+                            (SELECT COUNT(*) FROM applications a WHERE a.user_id = u.id) AS actual_applications,
+                            (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.id) AS actual_tasks,
+                            (SELECT COUNT(*) FROM tasks t
+                             WHERE t.user_id = u.id AND t.status = 'completed') AS actual_tasks_completed,
+                            (SELECT COUNT(*) FROM achievements h
+                             WHERE h.user_id = u.id AND h.unlocked = TRUE) AS actual_achievements_unlocked
+                        FROM users u
+                        LEFT JOIN user_counters c ON c.user_id = u.id
+                        WHERE u.id > %s
+                        ORDER BY u.id
+                        LIMIT %s
+                    """
+                    rows = await self._db.fetch_all(query, (last_id, self.batch_size))
+                    if not rows:
+                        break
+                    checked += len(rows)
+                    last_id = rows[-1]["id"]
+
+                    drifted = [row["id"] for row in rows if await self._repair(row)]
+                    repaired += len(drifted)
+                    if drifted and self._on_repaired is not None:
+                        self._on_repaired(drifted)
+
+                    if len(rows) < self.batch_size:
+                        break
+                    # Let other writers at the tables between batches
+                    await asyncio.sleep(self.batch_pause)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Counter reconciliation failed after {checked} users: {e}")
+            finally:
+                self.runs += 1
+                self.last_checked = checked
+                self.last_repaired = repaired
+                self.total_repaired += repaired
+                self.last_run_at = run_at
+                self.last_duration_ms = (time.perf_counter() - started) * 1000
+
+            if repaired:
+                logger.info(f"Repaired counters for {repaired} of {checked} users")
+            return repaired
+
+    async def _reconcile_loop(self):
+        while True:
+            await self.reconcile()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic reconciliation on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "conflicts": self.conflicts,
+            "total_repaired": self.total_repaired,
+            "last_checked": self.last_checked,
+            "last_repaired": self.last_repaired,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "batch_size": self.batch_size,
+            "batch_pause_seconds": self.batch_pause,
+            "interval_seconds": self.interval,
+        }
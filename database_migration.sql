@@ -108,6 +108,16 @@ CREATE TABLE achievements (
     INDEX idx_unlocked (unlocked)
 );
 
+-- Per-user counters maintained alongside applications and tasks writes
+-- (databases created before this table get it from backend/schema_upgrades.py)
+CREATE TABLE user_counters (
+    user_id VARCHAR(36) PRIMARY KEY,
+    applications INT DEFAULT 0,
+    tasks INT DEFAULT 0,
+    tasks_completed INT DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- User sessions table
 CREATE TABLE user_sessions (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -139,6 +149,35 @@ CREATE TABLE productivity_logs (
     INDEX idx_timestamp (timestamp)
 );
 
+-- Hourly and daily productivity totals by action, rolled up from
+-- productivity_logs; user_id '' holds the totals across all users
+-- (databases created before these tables get them from backend/schema_upgrades.py)
+CREATE TABLE productivity_rollups_hourly (
+    user_id VARCHAR(36) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    action VARCHAR(255) NOT NULL,
+    events INT DEFAULT 0,
+    points BIGINT DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_start, action)
+);
+
+CREATE TABLE productivity_rollups_daily (
+    user_id VARCHAR(36) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    action VARCHAR(255) NOT NULL,
+    events INT DEFAULT 0,
+    points BIGINT DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_start, action)
+);
+
+-- How far each rollup has read its source table, as a (timestamp, id) position
+CREATE TABLE rollup_watermarks (
+    name VARCHAR(100) PRIMARY KEY,
+    last_timestamp DATETIME NOT NULL,
+    last_id VARCHAR(36) NOT NULL DEFAULT '',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 -- Relocate data table - Enhanced for better content management
 CREATE TABLE relocate_data (
     id VARCHAR(36) PRIMARY KEY,
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+ThriveRemoteOS Achievement Seeding Benchmark
+Simulates a registration burst and compares per-achievement seeding (one
+lookup plus one INSERT per catalog entry) against the single multi-row
+INSERT IGNORE, against the database configured in backend/.env
+"""
+
+import sys
+import time
+import uuid
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from server import execute_query  # noqa: E402
+from achievements import ACHIEVEMENT_CATALOG, build_seed_query  # noqa: E402
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+USER_PREFIX = "bench-seed-"
+
+
+def create_users(count: int):
+    user_ids = [f"{USER_PREFIX}{uuid.uuid4().hex[:24]}" for _ in range(count)]
+    for user_id in user_ids:
+        execute_query(
+            "INSERT INTO users (id, username, password_hash) VALUES (%s, %s, %s)",
+            (user_id, user_id, "benchmark")
+        )
+    return user_ids
+
+
+def delete_users():
+    execute_query("DELETE FROM achievements WHERE user_id LIKE %s", (USER_PREFIX + "%",))
+    execute_query("DELETE FROM users WHERE id LIKE %s", (USER_PREFIX + "%",))
+
+
+def seed_per_achievement(user_id: str):
+    for achievement in ACHIEVEMENT_CATALOG:
+        existing = execute_query(
+            "SELECT id FROM achievements WHERE id = %s AND user_id = %s",
+            (achievement.id, user_id), fetch_one=True
+        )
+        if not existing:
+            execute_query(
+                """
+                INSERT INTO achievements (id, user_id, achievement_type, title, description, icon, unlocked)
+                VALUES (%s, %s, %s, %s, %s, %s, FALSE)
+                """,
+                (achievement.id, user_id, achievement.achievement_type,
+                 achievement.title, achievement.description, achievement.icon)
+            )
+
+
+def seed_catalog(user_id: str):
+    query, params = build_seed_query([user_id])
+    execute_query(query, params)
+
+
+def bench(seed, user_ids, concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(seed, user_ids))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark achievement seeding for registration bursts")
+    parser.add_argument("--users", type=int, default=200, help="registrations per burst")
+    parser.add_argument("--concurrency", type=int, default=10, help="simultaneous registrations")
+    args = parser.parse_args()
+
+    results = {}
+    try:
+        for name, seed in (("per_achievement", seed_per_achievement), ("multi_row_insert", seed_catalog)):
+            delete_users()
+            user_ids = create_users(args.users)
+            results[name] = args.users / bench(seed, user_ids, args.concurrency)
+
+        # Reseeding existing users must be a no-op
+        seed_catalog(user_ids[0])
+        row = execute_query(
+            "SELECT COUNT(*) as count FROM achievements WHERE user_id = %s", (user_ids[0],), fetch_one=True
+        )
+        assert row["count"] == len(ACHIEVEMENT_CATALOG), row
+    finally:
+        delete_users()
+
+    for name, users_per_sec in results.items():
+        logger.info(f"{name:>16}: {users_per_sec:,.0f} registrations/sec")
+    logger.info(f"speedup: {results['multi_row_insert'] / results['per_achievement']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+ThriveRemoteOS Bulk Write Benchmark
+Compares row-at-a-time inserts (the old seeding/ingestion path) against
+the batched execute_many path, against the database configured in backend/.env
+"""
+
+import sys
+import time
+import uuid
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from server import execute_query, execute_many  # noqa: E402
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TABLE = "bench_bulk_rows"
+INSERT_QUERY = f"""
+    INSERT INTO {TABLE} (id, user_id, title, points, created_at)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def reset_table():
+    execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+    execute_query(f"""
+        CREATE TABLE {TABLE} (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36),
+            title VARCHAR(255),
+            points INT,
+            created_at DATETIME
+        )
+    """)
+
+
+def make_rows(count: int):
+    user_id = str(uuid.uuid4())
+    return [
+        (str(uuid.uuid4()), user_id, f"Benchmark row {i}", i % 50, datetime.now())
+        for i in range(count)
+    ]
+
+
+def bench_row_at_a_time(rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        execute_query(INSERT_QUERY, row)
+    return time.perf_counter() - start
+
+
+def bench_execute_many(rows, batch_size: int) -> float:
+    start = time.perf_counter()
+    execute_many(INSERT_QUERY, rows, batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk database writes")
+    parser.add_argument("--rows", type=int, default=1000, help="rows per run")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per executemany batch")
+    args = parser.parse_args()
+
+    results = {}
+    try:
+        reset_table()
+        elapsed = bench_row_at_a_time(make_rows(args.rows))
+        results["row_at_a_time"] = args.rows / elapsed
+
+        reset_table()
+        elapsed = bench_execute_many(make_rows(args.rows), args.batch_size)
+        results["execute_many"] = args.rows / elapsed
+    finally:
+        execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+
+    for name, rows_per_sec in results.items():
+        logger.info(f"{name:>14}: {rows_per_sec:,.0f} rows/sec")
+    logger.info(f"speedup: {results['execute_many'] / results['row_at_a_time']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Shared test setup for ThriveRemoteOS backend modules
+The backend is imported as flat modules, the same way server.py imports them
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from tests.helpers import DEFAULT_USERS, sqlite_database  # noqa: E402
+
+
+@pytest.fixture
+def database(request, tmp_path):
+    """SQLite AsyncDatabase with a users row per id
+
+    The ids default to DEFAULT_USERS; parametrize indirectly to change them.
+    """
+    user_ids = getattr(request, "param", DEFAULT_USERS)
+    database = sqlite_database(tmp_path / "test.db")
+
+    async def add_users():
+        for user_id in user_ids:
+            await database.execute(
+                "INSERT INTO users (id, username, password_hash) VALUES (%s, %s, %s)",
+                (user_id, user_id, "x"),
+            )
+
+    asyncio.run(add_users())
+    yield database
+    database.shutdown()
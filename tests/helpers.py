@@ -0,0 +1,49 @@
+"""
+Small stand-ins shared by the backend tests
+"""
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# users rows the database fixture creates unless parametrized otherwise
+DEFAULT_USERS = ("u1", "u2")
+
+
+class FakeUnitOfWork:
+    """Just the parts of async_db.UnitOfWork the engines use: after_finish and committed"""
+
+    def __init__(self):
+        self.committed = False
+        self._callbacks = []
+
+    def after_finish(self, callback):
+        self._callbacks.append(callback)
+
+    def finish(self, commit: bool = True):
+        self.committed = commit
+        for callback in self._callbacks:
+            callback()
+
+
+def sqlite_database(path):
+    """An AsyncDatabase over a fresh SQLite file created from database_migration.sql
+
+    Statements run through the same QueryExecutor as server.py, minus the
+    metrics and replica routing it is given there.
+    """
+    import sqlite3
+
+    from async_db import AsyncDatabase
+    from db_pool import ConnectionPool
+    from query_executor import QueryExecutor
+    from sqlite_backend import SQLiteBackend
+
+    backend = SQLiteBackend(str(path), schema_path=ROOT / "database_migration.sql")
+    pool = ConnectionPool(backend.connect, pool_size=4, max_overflow=4, timeout=5.0)
+
+    def acquire(query=None):
+        return pool.acquire()
+
+    executor = QueryExecutor(acquire, (sqlite3.Error,))
+    return AsyncDatabase(executor.execute, acquire, executor.execute_many, max_workers=4, acquire_timeout=5.0)
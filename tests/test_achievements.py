@@ -0,0 +1,175 @@
+"""
+Tests for the achievement rule engine
+"""
+
+import asyncio
+
+from achievements import ACHIEVEMENT_RULES, EVENT_COUNTERS, RULES_BY_COUNTER, AchievementEngine
+
+from tests.helpers import FakeUnitOfWork
+
+
+class FakeStore:
+    """Progress loader and conditional unlock backed by dicts"""
+
+    def __init__(self, counters=None, unlocked=None):
+        self.counters = dict(counters or {})
+        self.unlocked = set(unlocked or ())
+        self.loads = []
+        self.unlock_calls = []
+
+    async def load(self, user_id, uow):
+        self.loads.append((user_id, uow))
+        return dict(self.counters), set(self.unlocked)
+
+    async def unlock(self, user_id, achievement_id, uow):
+        self.unlock_calls.append((user_id, achievement_id, uow))
+        if achievement_id in self.unlocked:
+            return False
+        self.unlocked.add(achievement_id)
+        return True
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_every_rule_is_reachable_from_an_event():
+    counters = {counter for counter, _ in EVENT_COUNTERS.values()}
+    assert {rule.counter for rule in ACHIEVEMENT_RULES} <= counters
+    assert sum(len(rules) for rules in RULES_BY_COUNTER.values()) == len(ACHIEVEMENT_RULES)
+
+
+def test_count_event_unlocks_at_threshold():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+
+    for expected in range(1, 5):
+        assert run(engine.handle("u1", "easter_egg_found")) == expected
+    assert store.unlock_calls == []
+
+    assert run(engine.handle("u1", "easter_egg_found")) == 5
+    assert store.unlock_calls == [("u1", "easter_hunter", None)]
+    assert engine.unlocks == 1
+    assert len(store.loads) == 1
+
+
+def test_level_event_keeps_the_highest_value():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+
+    assert run(engine.handle("u1", "savings_update", {"progress": 30})) == 30
+    assert run(engine.handle("u1", "savings_update", {"progress": 10})) == 30
+    assert [call[1] for call in store.unlock_calls] == ["savings_milestone_25"]
+
+    assert run(engine.handle("u1", "savings_update", {"progress": 60})) == 60
+    assert [call[1] for call in store.unlock_calls] == ["savings_milestone_25", "savings_milestone_50"]
+
+
+def test_unlocked_achievement_is_not_unlocked_again():
+    store = FakeStore(counters={"tasks_completed": 9})
+    engine = AchievementEngine(store.load, store.unlock)
+
+    run(engine.handle("u1", "task_completed", {"tasks_completed": 10}))
+    run(engine.handle("u1", "task_completed", {"tasks_completed": 10}))
+    run(engine.handle("u1", "task_completed", {"tasks_completed": 11}))
+
+    assert store.unlock_calls == [("u1", "task_master", None)]
+
+
+def test_already_unlocked_in_database_is_skipped():
+    store = FakeStore(counters={"applications": 3}, unlocked={"first_job_apply"})
+    engine = AchievementEngine(store.load, store.unlock)
+
+    run(engine.handle("u1", "job_application", {"applications": 4}))
+
+    assert store.unlock_calls == []
+
+
+def test_lost_unlock_race_is_not_counted():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+    # Another worker unlocked it after this one loaded progress
+    run(engine._get_progress("u1"))
+    store.unlocked.add("relocation_explorer")
+
+    run(engine.handle("u1", "relocation_explored"))
+
+    assert store.unlock_calls == [("u1", "relocation_explorer", None)]
+    assert engine.unlocks == 0
+    run(engine.handle("u1", "relocation_explored"))
+    assert len(store.unlock_calls) == 1
+
+
+def test_unknown_action_is_ignored():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+
+    assert run(engine.handle("u1", "not_an_event")) is None
+    assert store.loads == []
+    assert engine.events == 0
+
+
+def test_progress_loads_on_the_event_transaction_and_caches_after_commit():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+    uow = FakeUnitOfWork()
+
+    run(engine.handle("u1", "terminal_command", uow=uow))
+    assert store.loads == [("u1", uow)]
+    assert engine.stats()["users_tracked"] == 0
+
+    uow.finish(commit=True)
+    assert engine.stats()["users_tracked"] == 1
+    assert run(engine.handle("u1", "terminal_command")) == 2
+    assert len(store.loads) == 1
+
+
+def test_rolled_back_event_changes_nothing():
+    store = FakeStore(counters={"commands_executed": 49})
+    engine = AchievementEngine(store.load, store.unlock)
+    run(engine._get_progress("u1"))
+
+    uow = FakeUnitOfWork()
+    assert run(engine.handle("u1", "terminal_command", uow=uow)) == 50
+    assert store.unlock_calls == [("u1", "terminal_ninja", uow)]
+    uow.finish(commit=False)
+    store.unlocked.discard("terminal_ninja")
+
+    # The counter did not advance and the unlock is attempted again
+    assert run(engine.handle("u1", "terminal_command")) == 50
+    assert [call[1] for call in store.unlock_calls] == ["terminal_ninja", "terminal_ninja"]
+    assert engine.unlocks == 2
+
+
+def test_rolled_back_load_is_not_cached():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock)
+    uow = FakeUnitOfWork()
+
+    run(engine.handle("u1", "terminal_command", uow=uow))
+    uow.finish(commit=False)
+
+    assert engine.stats()["users_tracked"] == 0
+    run(engine.handle("u1", "terminal_command"))
+    assert len(store.loads) == 2
+
+
+def test_progress_expires_after_ttl():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock, ttl_seconds=0)
+
+    run(engine.handle("u1", "terminal_command"))
+    run(engine.handle("u1", "terminal_command"))
+
+    assert len(store.loads) == 2
+
+
+def test_least_recently_used_user_is_evicted():
+    store = FakeStore()
+    engine = AchievementEngine(store.load, store.unlock, max_users=2)
+
+    for user_id in ("u1", "u2", "u1", "u3"):
+        run(engine.handle(user_id, "terminal_command"))
+
+    assert list(engine._progress) == ["u1", "u3"]
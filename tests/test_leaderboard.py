@@ -0,0 +1,158 @@
+"""
+Tests for the indexable skip list and the leaderboard built on it
+"""
+
+import asyncio
+import bisect
+import random
+
+import pytest
+
+from leaderboard import IndexableSkipList, Leaderboard
+
+
+def assert_matches(skiplist, oracle):
+    assert len(skiplist) == len(oracle)
+    assert skiplist.slice(0, len(oracle) + 1) == oracle
+    for value in oracle:
+        # Equal values: the first one's position, like list.index
+        assert skiplist.index(value) == oracle.index(value)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_skiplist_matches_a_sorted_list(seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    skiplist, oracle = IndexableSkipList(max_levels=8), []
+
+    for _ in range(400):
+        if oracle and rng.random() < 0.4:
+            value = rng.choice(oracle)
+            skiplist.remove(value)
+            oracle.remove(value)
+        else:
+            value = (rng.randrange(50), rng.choice("abc"))
+            skiplist.insert(value)
+            bisect.insort(oracle, value)
+
+        start, count = rng.randrange(len(oracle) + 2), rng.randrange(6)
+        assert skiplist.slice(start, count) == oracle[start:start + count]
+
+    assert_matches(skiplist, oracle)
+
+
+def test_from_sorted_matches_inserting_one_by_one():
+    random.seed(7)
+    values = sorted((random.randrange(1000), str(i)) for i in range(300))
+    skiplist = IndexableSkipList.from_sorted(values)
+
+    assert_matches(skiplist, values)
+    skiplist.insert((-1, "first"))
+    skiplist.remove(values[150])
+    assert_matches(skiplist, [(-1, "first")] + values[:150] + values[151:])
+
+
+def test_skiplist_edges():
+    skiplist = IndexableSkipList.from_sorted([])
+
+    assert len(skiplist) == 0
+    assert skiplist.slice(0, 5) == []
+    with pytest.raises(KeyError):
+        skiplist.index(1)
+    with pytest.raises(KeyError):
+        skiplist.remove(1)
+
+    skiplist.insert(1)
+    assert skiplist.slice(-1, 5) == []
+    assert skiplist.slice(0, 0) == []
+    assert skiplist.slice(1, 5) == []
+    with pytest.raises(KeyError):
+        skiplist.remove(2)
+
+
+def rows_loader(rows, on_chunk=None, chunk_size=2):
+    async def loader():
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+            if on_chunk is not None:
+                on_chunk(start)
+
+    return loader
+
+
+def test_ranking_orders_by_score_then_user():
+    board = Leaderboard(excluded={"shared"})
+    board.apply({"b": 50, "a": 50, "c": 80, "shared": 999, "zero": 0})
+
+    assert board.top() == [
+        {"rank": 1, "user_id": "c", "score": 80},
+        {"rank": 2, "user_id": "a", "score": 50},
+        {"rank": 3, "user_id": "b", "score": 50},
+    ]
+    assert board.rank("b") == {"rank": 3, "user_id": "b", "score": 50}
+    assert board.rank("shared") == {"rank": 4, "user_id": "shared", "score": 0}
+    assert [entry["user_id"] for entry in board.around("a", radius=1)] == ["c", "a", "b"]
+    assert board.top(limit=1, offset=2) == [{"rank": 3, "user_id": "b", "score": 50}]
+
+
+def test_apply_only_moves_users_up():
+    board = Leaderboard()
+    board.apply({"a": 100})
+    board.apply({"a": 90})
+
+    assert board.rank("a")["score"] == 100
+    board.apply({"a": 120})
+    assert board.rank("a")["score"] == 120
+    assert len(board) == 1
+
+
+def test_rebuild_replaces_the_ranking():
+    board = Leaderboard(excluded={"shared"})
+    board.apply({"stale": 500})
+
+    asyncio.run(board.rebuild(rows_loader([("a", 10), ("b", 30), ("shared", 99), ("c", None)])))
+
+    assert [entry["user_id"] for entry in board.top()] == ["b", "a"]
+    assert board.rank("stale")["rank"] == 3
+    assert board.stats()["rebuilds"] == 1
+
+
+def test_scores_committed_during_a_rebuild_are_kept():
+    board = Leaderboard()
+    board.apply({"a": 100, "b": 50})
+    rows = [("a", 100), ("b", 50), ("c", 20), ("d", 10)]
+
+    def commit_while_scanning(start):
+        if start == 0:
+            # a's scan row is already read; c's will be read stale
+            board.apply({"a": 115, "c": 40})
+        else:
+            # Applied twice, as when two batches report the same total
+            board.apply({"a": 115})
+
+    asyncio.run(board.rebuild(rows_loader(rows, commit_while_scanning)))
+
+    assert board.top() == [
+        {"rank": 1, "user_id": "a", "score": 115},
+        {"rank": 2, "user_id": "b", "score": 50},
+        {"rank": 3, "user_id": "c", "score": 40},
+        {"rank": 4, "user_id": "d", "score": 10},
+    ]
+    assert board._replay is None
+
+
+def test_failed_rebuild_keeps_the_old_ranking():
+    board = Leaderboard()
+    board.apply({"a": 10})
+
+    async def loader():
+        yield [("a", 10), ("b", 20)]
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(board.rebuild(loader))
+
+    assert board.top() == [{"rank": 1, "user_id": "a", "score": 10}]
+    assert board._replay is None
+    board.apply({"a": 11})
+    assert board.rank("a")["score"] == 11
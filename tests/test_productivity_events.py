@@ -0,0 +1,129 @@
+"""
+Tests for the batched productivity event writer
+"""
+
+import asyncio
+
+import pytest
+
+from productivity_events import ProductivityEventWriter
+
+from tests.helpers import DEFAULT_USERS as USERS, FakeUnitOfWork
+
+
+async def written(database):
+    logs = await database.fetch_all("SELECT user_id, action, points FROM productivity_logs")
+    users = await database.fetch_all("SELECT id, productivity_score FROM users ORDER BY id")
+    return logs, {row["id"]: row["productivity_score"] for row in users}
+
+
+def test_stop_drains_the_queue(database):
+    flushed = []
+
+    async def scenario():
+        writer = ProductivityEventWriter(database, flushed.append, batch_size=10, flush_interval=30)
+        writer.start()
+        for i in range(25):
+            await writer.submit(USERS[i % 2], "task_completed", 2, {"i": i}, None)
+        await writer.stop()
+        return writer, await written(database)
+
+    writer, (logs, scores) = asyncio.run(scenario())
+
+    assert len(logs) == 25
+    assert scores == {"u1": 26, "u2": 24}
+    assert writer.events_written == 25
+    assert writer.written_inline == 0
+    assert writer.stats()["queued"] == 0
+    assert writer.reserved == 0
+    assert writer.oldest_unwritten() is None
+    # on_flushed gets each batch's committed totals, not its deltas
+    latest = {}
+    for scores_flushed in flushed:
+        latest.update(scores_flushed)
+    assert latest == {"u1": 26, "u2": 24}
+
+
+def test_full_queue_writes_inline(database):
+    async def scenario():
+        writer = ProductivityEventWriter(
+            database, max_queue=1, batch_size=10, flush_interval=30, enqueue_timeout=0.05
+        )
+        writer.start()
+        await writer.submit("u1", "job_application", 5, {}, None)
+        queued_then = writer.stats()["queued"] + len(writer._batch)
+        await writer.submit("u1", "job_application", 7, {}, None)
+        stats = writer.stats()
+        await writer.stop()
+        return queued_then, stats, await written(database)
+
+    queued_then, stats, (logs, scores) = asyncio.run(scenario())
+
+    assert queued_then == 1
+    assert stats["written_inline"] == 1
+    assert stats["backpressure_waits"] == 1
+    assert stats["queue_high_water"] == 1
+    assert len(logs) == 2
+    assert scores["u1"] == 12
+
+
+def test_overlay_includes_queued_points(database):
+    async def scenario():
+        writer = ProductivityEventWriter(database, flush_interval=30)
+        writer.start()
+        await writer.submit("u1", "pong_score", 4, {}, None)
+        await writer.submit("u1", "pong_score", 6, {}, None)
+        row = await database.fetch_one("SELECT id, productivity_score FROM users WHERE id = %s", ("u1",))
+        during = (row["productivity_score"], writer.overlay(row)["productivity_score"])
+        await writer.stop()
+        row = await database.fetch_one("SELECT id, productivity_score FROM users WHERE id = %s", ("u1",))
+        return during, (row["productivity_score"], writer.overlay(row)["productivity_score"])
+
+    during, after = asyncio.run(scenario())
+
+    assert during == (0, 10)
+    assert after == (10, 10)
+
+
+def test_event_is_queued_only_when_its_transaction_commits(database):
+    async def scenario():
+        writer = ProductivityEventWriter(database, max_queue=2, flush_interval=30)
+        writer.start()
+        committed, rolled_back = FakeUnitOfWork(), FakeUnitOfWork()
+        await writer.submit("u1", "task_completed", 3, {}, committed)
+        await writer.submit("u2", "task_completed", 4, {}, rolled_back)
+        reserved = writer.reserved
+        committed.finish(commit=True)
+        rolled_back.finish(commit=False)
+        released = writer.reserved
+        await writer.stop()
+        return reserved, released, await written(database)
+
+    reserved, released, (logs, scores) = asyncio.run(scenario())
+
+    assert reserved == 2
+    assert released == 1
+    assert [row["user_id"] for row in logs] == ["u1"]
+    assert scores == {"u1": 3, "u2": 0}
+
+
+def test_inline_write_joins_the_callers_transaction(database):
+    class Abort(Exception):
+        pass
+
+    async def scenario():
+        # Not started, so every event takes the inline path
+        writer = ProductivityEventWriter(database)
+        with pytest.raises(Abort):
+            async with database.transaction() as uow:
+                await writer.submit("u1", "task_completed", 9, {}, uow)
+                raise Abort()
+        async with database.transaction() as uow:
+            await writer.submit("u2", "task_completed", 1, {}, uow)
+        return writer, await written(database)
+
+    writer, (logs, scores) = asyncio.run(scenario())
+
+    assert writer.written_inline == 2
+    assert [row["user_id"] for row in logs] == ["u2"]
+    assert scores == {"u1": 0, "u2": 1}
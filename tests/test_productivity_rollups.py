@@ -0,0 +1,178 @@
+"""
+Tests for the incremental productivity rollups
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from productivity_rollups import ALL_USERS, WATERMARK_NAME, ProductivityRollup, bucket_floor
+
+BASE = datetime(2026, 3, 14, 9, 0, 0)
+
+
+async def add_logs(database, logs):
+    await database.execute_many(
+        "INSERT INTO productivity_logs (id, user_id, action, timestamp, points) VALUES (%s, %s, %s, %s, %s)",
+        logs,
+    )
+
+
+async def hourly(database, user_id):
+    rows = await database.fetch_all(
+        """
+        SELECT bucket_start, action, events, points FROM productivity_rollups_hourly
+        WHERE user_id = %s ORDER BY bucket_start, action
+        """,
+        (user_id,),
+    )
+    return [(row["bucket_start"], row["action"], row["events"], row["points"]) for row in rows]
+
+
+def test_bucket_floor():
+    timestamp = datetime(2026, 3, 14, 9, 26, 53, 589793)
+
+    assert bucket_floor(timestamp, "hour") == datetime(2026, 3, 14, 9)
+    assert bucket_floor(timestamp, "day") == datetime(2026, 3, 14)
+    assert bucket_floor(datetime(2026, 3, 14), "day") == datetime(2026, 3, 14)
+
+
+def test_aggregate_totals_per_user_and_across_users():
+    rows = [
+        {"user_id": "u1", "action": "task", "timestamp": BASE + timedelta(minutes=5), "points": 10},
+        {"user_id": "u1", "action": "task", "timestamp": BASE + timedelta(minutes=50), "points": 5},
+        {"user_id": "u2", "action": "task", "timestamp": BASE + timedelta(minutes=70), "points": None},
+    ]
+
+    writes = ProductivityRollup._aggregate(rows)
+
+    next_hour = BASE + timedelta(hours=1)
+    assert writes["hour"] == [
+        (ALL_USERS, BASE, "task", 2, 15),
+        (ALL_USERS, next_hour, "task", 1, 0),
+        ("u1", BASE, "task", 2, 15),
+        ("u2", next_hour, "task", 1, 0),
+    ]
+    day = datetime(2026, 3, 14)
+    assert writes["day"] == [
+        (ALL_USERS, day, "task", 3, 15),
+        ("u1", day, "task", 2, 15),
+        ("u2", day, "task", 1, 0),
+    ]
+
+
+def test_roll_up_in_batches_across_the_watermark(database):
+    # Five rows share a timestamp, so batches split inside a tie on it
+    logs = [(f"a{i}", "u1", "task", BASE, 1) for i in range(5)]
+    logs += [(f"b{i}", "u2", "apply", BASE + timedelta(minutes=90), 10) for i in range(2)]
+
+    async def scenario():
+        await add_logs(database, logs)
+        rollup = ProductivityRollup(database, batch_size=2, batch_pause=0, grace=0)
+        first = await rollup.roll_up()
+        again = await rollup.roll_up()
+        # Stamped after the watermark, so the next run picks it up
+        await add_logs(database, [("c0", "u1", "task", BASE + timedelta(hours=2), 3)])
+        later = await rollup.roll_up()
+        watermark = await database.fetch_one(
+            "SELECT last_timestamp, last_id FROM rollup_watermarks WHERE name = %s", (WATERMARK_NAME,)
+        )
+        return rollup, (first, again, later), watermark, await hourly(database, "u1"), await hourly(database, ALL_USERS)
+
+    rollup, counts, watermark, user_rows, all_rows = asyncio.run(scenario())
+
+    assert counts == (7, 0, 1)
+    assert (watermark["last_timestamp"], watermark["last_id"]) == (BASE + timedelta(hours=2), "c0")
+    assert user_rows == [(BASE, "task", 5, 5), (BASE + timedelta(hours=2), "task", 1, 3)]
+    assert all_rows == [
+        (BASE, "task", 5, 5),
+        (BASE + timedelta(hours=1), "apply", 2, 20),
+        (BASE + timedelta(hours=2), "task", 1, 3),
+    ]
+    assert rollup.stats()["total_rows"] == 8
+    assert rollup.errors == 0
+
+
+def test_rows_past_the_horizon_wait_for_a_later_run(database):
+    now = datetime.now()
+    oldest_queued = [now - timedelta(minutes=30)]
+
+    async def scenario():
+        await add_logs(database, [
+            ("old", "u1", "task", now - timedelta(hours=1), 1),
+            ("queued", "u1", "task", now - timedelta(minutes=30), 1),
+            ("fresh", "u1", "task", now - timedelta(seconds=5), 1),
+        ])
+        rollup = ProductivityRollup(database, visible_before=lambda: oldest_queued[0], grace=60, batch_pause=0)
+        counts = [await rollup.roll_up()]
+        oldest_queued[0] = None
+        counts.append(await rollup.roll_up())
+        return counts, rollup
+
+    counts, rollup = asyncio.run(scenario())
+
+    assert counts == [1, 1]
+    assert rollup.complete_through < now - timedelta(seconds=59)
+
+
+def test_stale_watermark_does_not_apply_a_batch_twice(database):
+    async def scenario():
+        await add_logs(database, [(f"a{i}", "u1", "task", BASE, 2) for i in range(3)])
+        first = ProductivityRollup(database, batch_pause=0, grace=0)
+        second = ProductivityRollup(database, batch_pause=0, grace=0)
+        start = await second._load_watermark()
+        await first.roll_up()
+        # second still holds the position from before first's batch
+        stale = await second._roll_up_batch(start, datetime.now())
+        after = await second.roll_up()
+        return stale, after, await hourly(database, "u1")
+
+    stale, after, rows = asyncio.run(scenario())
+
+    assert stale[0] == -1
+    assert after == 0
+    assert rows == [(BASE, "task", 3, 6)]
+
+
+@pytest.mark.parametrize("database", [("u1", "u2", "u3")], indirect=True)
+def test_concurrent_runs_count_every_row_once(database):
+    logs = [(f"r{i:03d}", f"u{i % 3 + 1}", "task", BASE + timedelta(minutes=i), 1) for i in range(120)]
+
+    async def scenario():
+        await add_logs(database, logs)
+        rollups = [ProductivityRollup(database, batch_size=7, batch_pause=0, grace=0) for _ in range(3)]
+        counts = await asyncio.gather(*(rollup.roll_up() for rollup in rollups))
+        rows = await database.fetch_all(
+            "SELECT SUM(events) AS events, SUM(points) AS points FROM productivity_rollups_daily WHERE user_id = %s",
+            (ALL_USERS,),
+        )
+        return counts, rows[0], rollups
+
+    counts, totals, rollups = asyncio.run(scenario())
+
+    assert sum(counts) == 120
+    assert (totals["events"], totals["points"]) == (120, 120)
+    assert all(rollup.errors == 0 for rollup in rollups)
+
+
+def test_series_fills_empty_buckets(database):
+    async def scenario():
+        await add_logs(database, [
+            ("a", "u1", "task", BASE + timedelta(minutes=10), 4),
+            ("b", "u1", "apply", BASE + timedelta(minutes=20), 6),
+            ("c", "u1", "task", BASE + timedelta(hours=2), 1),
+        ])
+        rollup = ProductivityRollup(database, batch_pause=0, grace=0)
+        await rollup.roll_up()
+        return (
+            await rollup.series("u1", "hour", BASE + timedelta(minutes=30), BASE + timedelta(hours=3)),
+            await rollup.series("u1", "hour", BASE, BASE + timedelta(hours=1), action="task"),
+        )
+
+    series, tasks_only = asyncio.run(scenario())
+
+    assert [(entry["events"], entry["points"]) for entry in series] == [(2, 10), (0, 0), (1, 1)]
+    assert series[0]["bucket_start"] == BASE.isoformat()
+    assert series[0]["actions"] == {"apply": {"events": 1, "points": 6}, "task": {"events": 1, "points": 4}}
+    assert tasks_only[0]["actions"] == {"task": {"events": 1, "points": 4}}
@@ -0,0 +1,177 @@
+"""
+Tests for the user_counters increments and the counter reconciler
+"""
+
+import asyncio
+
+import pytest
+
+from user_counters import COUNTER_COLUMNS, CounterReconciler, build_increment
+
+
+async def counters(database, user_id):
+    row = await database.fetch_one(
+        "SELECT applications, tasks, tasks_completed FROM user_counters WHERE user_id = %s", (user_id,)
+    )
+    return None if row is None else tuple(row[column] for column in COUNTER_COLUMNS)
+
+
+async def add_activity(database, user_id, applications=0, tasks=0, completed=0, achievements=0):
+    await database.execute(
+        "INSERT IGNORE INTO jobs (id, title, company) VALUES (%s, %s, %s)", ("j1", "Dev", "Acme")
+    )
+    for i in range(applications):
+        await database.execute(
+            "INSERT INTO applications (id, user_id, job_id) VALUES (%s, %s, %s)", (f"{user_id}-a{i}", user_id, "j1")
+        )
+    for i in range(tasks):
+        status = "completed" if i < completed else "pending"
+        await database.execute(
+            "INSERT INTO tasks (id, user_id, title, status) VALUES (%s, %s, %s, %s)",
+            (f"{user_id}-t{i}", user_id, "task", status),
+        )
+    for i in range(achievements):
+        await database.execute(
+            "INSERT INTO achievements (id, user_id, unlocked) VALUES (%s, %s, TRUE)", (f"a{i}", user_id)
+        )
+
+
+def test_build_increment_lists_only_the_given_columns():
+    query, params = build_increment("u1", {"tasks": 1, "tasks_completed": -1})
+
+    assert "INSERT INTO user_counters (user_id, tasks, tasks_completed)" in query
+    assert "tasks = tasks + VALUES(tasks), tasks_completed = tasks_completed + VALUES(tasks_completed)" in query
+    assert "applications" not in query
+    assert params == ("u1", 1, -1)
+
+
+def test_build_increment_rejects_unknown_counters():
+    with pytest.raises(ValueError):
+        build_increment("u1", {"tasks": 1, "logins": 1})
+
+
+def test_build_increment_creates_then_adds(database):
+    async def scenario():
+        await database.execute(*build_increment("u1", {"applications": 1}))
+        created = await counters(database, "u1")
+        await database.execute(*build_increment("u1", {"applications": 2, "tasks": 1}))
+        return created, await counters(database, "u1")
+
+    assert asyncio.run(scenario()) == ((1, 0, 0), (3, 1, 0))
+
+
+def test_missing_rows_are_created_from_the_recount(database):
+    repaired_ids = []
+
+    async def scenario():
+        await add_activity(database, "u1", applications=2, tasks=3, completed=1)
+        reconciler = CounterReconciler(database, on_repaired=repaired_ids.extend, batch_pause=0)
+        first = await reconciler.reconcile()
+        second = await reconciler.reconcile()
+        return first, second, await counters(database, "u1"), await counters(database, "u2")
+
+    first, second, u1, u2 = asyncio.run(scenario())
+
+    # u2 has nothing to count but still gets its row
+    assert (first, second) == (2, 0)
+    assert u1 == (2, 3, 1)
+    assert u2 == (0, 0, 0)
+    assert sorted(repaired_ids) == ["u1", "u2"]
+
+
+def test_drifted_counters_are_corrected_by_their_difference(database):
+    async def scenario():
+        await add_activity(database, "u1", applications=1, tasks=2, completed=2, achievements=2)
+        await database.execute(*build_increment("u1", {"applications": 4, "tasks": 2, "tasks_completed": 1}))
+        await database.execute(*build_increment("u2", {"applications": 0}))
+        reconciler = CounterReconciler(database, batch_size=1, batch_pause=0)
+        repaired = await reconciler.reconcile()
+        user = await database.fetch_one("SELECT achievements_unlocked FROM users WHERE id = %s", ("u1",))
+        return repaired, reconciler, await counters(database, "u1"), user["achievements_unlocked"]
+
+    repaired, reconciler, u1, achievements_unlocked = asyncio.run(scenario())
+
+    assert repaired == 1
+    assert u1 == (1, 2, 2)
+    assert achievements_unlocked == 2
+    assert reconciler.stats()["last_checked"] == 2
+    assert reconciler.conflicts == 0
+
+
+def test_buffered_increments_count_as_stored(database):
+    async def scenario():
+        await add_activity(database, "u1", applications=3)
+        await database.execute(*build_increment("u1", {"applications": 1}))
+        # Two applications are counted in memory and not written yet
+        reconciler = CounterReconciler(
+            database,
+            stored_view=lambda row: {**row, "applications": (row["applications"] or 0) + 2}
+            if row["user_id"] == "u1" else row,
+            batch_pause=0,
+        )
+        await reconciler.reconcile()
+        return await counters(database, "u1")
+
+    assert asyncio.run(scenario())[0] == 1
+
+
+def test_a_repair_read_by_two_workers_is_applied_once(database):
+    async def scenario():
+        await add_activity(database, "u1", applications=2, achievements=1)
+        await database.execute(*build_increment("u1", {"applications": 5}))
+        first, second = (CounterReconciler(database, batch_pause=0) for _ in range(2))
+        row = await database.fetch_one(
+            """
+            SELECT u.id AS user_id, u.achievements_unlocked, 1 AS has_counters,
+                c.applications, c.tasks, c.tasks_completed,
+                2 AS actual_applications, 0 AS actual_tasks, 0 AS actual_tasks_completed,
+                1 AS actual_achievements_unlocked
+            FROM users u JOIN user_counters c ON c.user_id = u.id WHERE u.id = %s
+            """,
+            ("u1",),
+        )
+        applied = [await first._repair(row), await second._repair(row)]
+        user = await database.fetch_one("SELECT achievements_unlocked FROM users WHERE id = %s", ("u1",))
+        return applied, second.conflicts, await counters(database, "u1"), user["achievements_unlocked"]
+
+    applied, conflicts, u1, achievements_unlocked = asyncio.run(scenario())
+
+    assert applied == [True, False]
+    assert conflicts == 2
+    assert u1 == (2, 0, 0)
+    assert achievements_unlocked == 1
+
+
+def test_a_missing_row_read_by_two_workers_is_created_once(database):
+    async def scenario():
+        await add_activity(database, "u1", tasks=4)
+        row = {
+            "user_id": "u1", "has_counters": 0, "applications": None, "tasks": None, "tasks_completed": None,
+            "achievements_unlocked": 0, "actual_applications": 0, "actual_tasks": 4,
+            "actual_tasks_completed": 0, "actual_achievements_unlocked": 0,
+        }
+        first, second = (CounterReconciler(database) for _ in range(2))
+        applied = [await first._repair(row), await second._repair(row)]
+        return applied, await counters(database, "u1")
+
+    applied, u1 = asyncio.run(scenario())
+
+    assert applied == [True, False]
+    assert u1 == (0, 4, 0)
+
+
+def test_concurrent_reconcilers_leave_exact_counts(database):
+    async def scenario():
+        await add_activity(database, "u1", applications=3, tasks=2, completed=1, achievements=1)
+        await database.execute(*build_increment("u1", {"applications": 7, "tasks": 1}))
+        await database.execute("UPDATE users SET achievements_unlocked = 4 WHERE id = %s", ("u1",))
+        reconcilers = [CounterReconciler(database, batch_pause=0) for _ in range(3)]
+        await asyncio.gather(*(reconciler.reconcile() for reconciler in reconcilers))
+        user = await database.fetch_one("SELECT achievements_unlocked FROM users WHERE id = %s", ("u1",))
+        return reconcilers, await counters(database, "u1"), user["achievements_unlocked"]
+
+    reconcilers, u1, achievements_unlocked = asyncio.run(scenario())
+
+    assert u1 == (3, 2, 1)
+    assert achievements_unlocked == 1
+    assert all(reconciler.errors == 0 for reconciler in reconcilers)